@@ -17,11 +17,17 @@ AS5600 as5600;
 
 uint8_t receiverMac[] = {0x98, 0x3D, 0xAE, 0xAB, 0xE0, 0x74};
 
-struct CombinedSensorData {
+// Packet sent to the smart controller, the receiver uses the same layout.
+// seq goes up by one per packet, so the Pi can count packets lost on the radio link.
+struct __attribute__((packed)) CombinedSensorData {
+  uint8_t seq;
+  uint16_t time;  // millis() when the distances were read
   uint16_t distance[3]; 
   uint16_t encoderAngle;  
 };
 
+uint8_t packetSeq = 0;
+
 void setup() {
   Serial.begin(115200);
   Wire.begin();
@@ -99,6 +105,8 @@ void loop() {
   }
 
   dataToSend.encoderAngle = as5600.rawAngle(); 
+  dataToSend.time = (uint16_t)millis();
+  dataToSend.seq = packetSeq++;
 
   Serial.print("AS5600 Encoder Angle: ");
   Serial.print(dataToSend.encoderAngle);
@@ -12,6 +12,15 @@ typedef struct {
   bool sw;
 } JoystickData;
 
+// Packet of the sensor ESP (ESP_motor_kant_sensoren.ino), seq and time are set by the sender
+#define NUM_DISTANCE_SENSORS 3
+typedef struct __attribute__((packed)) {
+  uint8_t seq;
+  uint16_t time;
+  uint16_t distance[NUM_DISTANCE_SENSORS];
+  uint16_t encoderAngle;
+} SensorPacket;
+
 #define JOY1_X  2
 #define JOY1_Y  3
 #define JOY1_SW 6
@@ -20,9 +29,82 @@ typedef struct {
 #define JOY2_Y  5
 #define JOY2_SW 7
 
+// Output on Serial1: text lines by default, binary frames after the Pi sends 'B' ('T' switches back).
+// Frame layout (little endian), see joystick/controller_protocol.py:
+// A5 5A, seq and millis (2) of the sensor ESP's packet, flags (ToF count | J1 sw << 4 | J2 sw << 5),
+// J1 x/y and J2 x/y as 12 bit pairs (3 bytes each), ToF id + distance (3 bytes each), CRC-16 (2)
+#define FRAME_MAX_SENSORS 15
+
+volatile bool binaryFrames = false;
+
+// CRC-16/CCITT, start 0xFFFF (binascii.crc_hqx on the Pi)
+uint16_t crc16(const uint8_t *data, size_t len) {
+  uint16_t crc = 0xFFFF;
+  for (size_t i = 0; i < len; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (int b = 0; b < 8; b++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+void packAxes(uint8_t *out, int x, int y) {
+  out[0] = x & 0xFF;
+  out[1] = ((x >> 8) & 0x0F) | ((y & 0x0F) << 4);
+  out[2] = (y >> 4) & 0xFF;
+}
+
+void sendFrame(uint8_t seq, uint16_t time, const SensorData *data, int numEntries,
+               const JoystickData &joy1, const JoystickData &joy2) {
+  uint8_t frame[14 + 3 * FRAME_MAX_SENSORS];
+  if (numEntries > FRAME_MAX_SENSORS) numEntries = FRAME_MAX_SENSORS;
+
+  frame[0] = 0xA5;
+  frame[1] = 0x5A;
+  frame[2] = seq;
+  frame[3] = time & 0xFF;
+  frame[4] = time >> 8;
+  frame[5] = numEntries | (joy1.sw ? 0x10 : 0) | (joy2.sw ? 0x20 : 0);
+  packAxes(frame + 6, joy1.x, joy1.y);
+  packAxes(frame + 9, joy2.x, joy2.y);
+
+  int pos = 12;
+  for (int i = 0; i < numEntries; i++) {
+    frame[pos++] = data[i].id;
+    frame[pos++] = data[i].distance & 0xFF;
+    frame[pos++] = data[i].distance >> 8;
+  }
+  uint16_t crc = crc16(frame + 2, pos - 2);
+  frame[pos++] = crc & 0xFF;
+  frame[pos++] = crc >> 8;
+  Serial1.write(frame, pos);
+}
+
 void OnDataRecv(const esp_now_recv_info_t *recvInfo, const uint8_t *incomingData, int len) {
-  int numEntries = len / sizeof(SensorData);
-  const SensorData* data = (const SensorData*)incomingData;
+  if (len < (int)sizeof(SensorPacket)) return;
+  SensorPacket packet;
+  memcpy(&packet, incomingData, sizeof(packet));
+
+  // ToF sensors are numbered from 1 in the order of the sensor ESP
+  SensorData data[NUM_DISTANCE_SENSORS];
+  int numEntries = NUM_DISTANCE_SENSORS;
+  for (int i = 0; i < numEntries; i++) {
+    data[i].id = i + 1;
+    data[i].distance = packet.distance[i];
+  }
+
+  if (binaryFrames) {
+    JoystickData joy1, joy2;
+    joy1.x = analogRead(JOY1_X);
+    joy1.y = analogRead(JOY1_Y);
+    joy1.sw = !digitalRead(JOY1_SW);
+    joy2.x = analogRead(JOY2_X);
+    joy2.y = analogRead(JOY2_Y);
+    joy2.sw = !digitalRead(JOY2_SW);
+    sendFrame(packet.seq, packet.time, data, numEntries, joy1, joy2);
+    return;
+  }
 
   for (int i = 0; i < numEntries; i++) {
     Serial1.print(data[i].id);
@@ -82,4 +164,11 @@ void setup() {
 }
 
 void loop() {
+  // Output format requests from the Pi
+  while (Serial1.available()) {
+    int c = Serial1.read();
+    if (c == 'B') binaryFrames = true;
+    else if (c == 'T') binaryFrames = false;
+  }
+  delay(10);
 }
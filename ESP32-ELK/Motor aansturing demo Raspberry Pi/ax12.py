@@ -1,4 +1,5 @@
 from time import sleep
+from collections import namedtuple
 from serial import Serial
 import RPi.GPIO as GPIO
 
@@ -102,6 +103,8 @@ class Ax12:
     AX_PUNCH_LENGTH = 5
     AX_SPEED_LENGTH = 5
     AX_GOAL_SP_LENGTH = 7
+    AX_BLOCK_READ_LENGTH = 4
+    AX_STATE_LENGTH = AX_MOVING - AX_PRESENT_POSITION_L + 1
 
     # /////////////////////////////////////////////////////////////// Specials
     AX_BYTE_READ = 1
@@ -155,6 +158,10 @@ class Ax12:
     # Servo timeout
     class timeoutError(Exception) : pass
 
+    # Present state of a servo as read from registers 36-46 (raw register values)
+    ServoState = namedtuple("ServoState", ["position", "speed", "load", "voltage",
+                                           "temperature", "registered", "moving"])
+
     def direction(self,d):
         GPIO.output(Ax12.RPI_DIRECTION_PIN, d)
         sleep(Ax12.RPI_DIRECTION_SWITCH_DELAY)
@@ -687,6 +694,47 @@ class Ax12:
         return self.readData(id)
 
 
+    # Read length consecutive registers starting at start with one READ_DATA
+    def readBlock(self, id, start, length):
+        self.direction(Ax12.RPI_DIRECTION_TX)
+        Ax12.port.flushInput()
+        checksum = (~(id + Ax12.AX_BLOCK_READ_LENGTH + Ax12.AX_READ_DATA + start + length))&0xff
+        outData = bytes([Ax12.AX_START,
+                         Ax12.AX_START,
+                         id,
+                         Ax12.AX_BLOCK_READ_LENGTH,
+                         Ax12.AX_READ_DATA,
+                         start,
+                         length,
+                         checksum])
+        Ax12.port.write(outData)
+        sleep(Ax12.TX_DELAY_TIME)
+        self.direction(Ax12.RPI_DIRECTION_RX)
+        reply = Ax12.port.read(5) # [0xff, 0xff, origin, length, error]
+        if len(reply) < 5 or reply[0] != 0xFF:
+            raise Ax12.timeoutError("Timeout on servo " + str(id))
+        error = reply[4]
+        if error != 0:
+            print ("Error from servo: " + Ax12.dictErrors.get(error, "Multiple") + ' (code  ' + hex(error) + ')')
+        # parameters followed by the checksum
+        data = Ax12.port.read(reply[3] - 1)
+        if len(data) != reply[3] - 1 or reply[3] - 2 != length:
+            raise Ax12.timeoutError("Incomplete reply from servo " + str(id))
+        if (~(sum(reply[2:]) + sum(data[:-1])))&0xff != data[-1]:
+            raise Ax12.axError("Checksum mismatch in reply from servo " + str(id))
+        return data[:-1]
+
+    # Read position, speed, load, voltage, temperature and moving status in one transaction
+    def readState(self, id):
+        d = self.readBlock(id, Ax12.AX_PRESENT_POSITION_L, Ax12.AX_STATE_LENGTH)
+        return Ax12.ServoState(position=d[0] | (d[1] << 8),
+                               speed=d[2] | (d[3] << 8),
+                               load=d[4] | (d[5] << 8),
+                               voltage=d[6],
+                               temperature=d[7],
+                               registered=d[8],
+                               moving=d[10])
+
     def learnServos(self, minValue=1, maxValue=6, verbose=False) :
         servoList = []
         for i in range(minValue, maxValue + 1):
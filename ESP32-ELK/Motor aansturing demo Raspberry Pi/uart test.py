@@ -16,7 +16,7 @@ servos = motor.learnServos(1, 17)
 print(f"Found servos: {servos}")
 
 widgets = {}
-current_index, step = 0, 0
+current_index = 0
 
 def move_motor(sid, val):
     try:
@@ -73,50 +73,33 @@ def toggle_motor_run(sid):
         widgets[sid]["running"] = True
 
 def update_servos():
-    global current_index, step
+    global current_index
     if not servos: return
     sid = servos[current_index]
     try:
-        if step == 0:
-            pos = safe_read(motor.readPosition, sid, default="-")
-            widgets[sid]["pos_var"].set(pos)
-            if isinstance(pos, int): draw_position(sid, pos)
-
-        elif step == 1:
-            widgets[sid]["voltage"] = safe_read(motor.readVoltage, sid, default=0) / 10
-
-        elif step == 2:
-            widgets[sid]["temp"] = safe_read(motor.readTemperature, sid, default=0)
-
-        elif step == 3:
-            moving = safe_read(motor.readMovingStatus, sid, default=0)
-            widgets[sid]["moving"] = "Yes" if moving else "No"
-
-        elif step == 4:
-            spd = safe_read(motor.readSpeed, sid, default=0)
-            speed = ((spd & 0x3FF) * 0.111) * (1 if spd < 1024 else -1)
-            widgets[sid]["speed"] = speed
-
-        elif step == 5:
-            ld = safe_read(motor.readLoad, sid, default=0)
-            load = ((ld & 0x3FF) / 1023 * 1.3875) * (1 if ld < 1024 else -1)
-            widgets[sid]["load"] = load
-
-            w = widgets[sid]
-            w["status"].config(text=
-                f"Voltage: {w['voltage']:.1f} V\n"
-                f"Temp: {w['temp']} C\n"
-                f"Moving: {w['moving']}\n"
-                f"Speed: {w['speed']:.1f} RPM\n"
-                f"Torque: {w['load']:.3f} Nm"
+        # One READ_DATA of the whole present state block per servo
+        state = safe_read(motor.readState, sid)
+        if state is not None:
+            widgets[sid]["pos_var"].set(state.position)
+            draw_position(sid, state.position)
+
+            speed = ((state.speed & 0x3FF) * 0.111) * (1 if state.speed < 1024 else -1)
+            load = ((state.load & 0x3FF) / 1023 * 1.3875) * (1 if state.load < 1024 else -1)
+
+            widgets[sid]["status"].config(text=
+                f"Voltage: {state.voltage / 10:.1f} V\n"
+                f"Temp: {state.temperature} C\n"
+                f"Moving: {'Yes' if state.moving else 'No'}\n"
+                f"Speed: {speed:.1f} RPM\n"
+                f"Torque: {load:.3f} Nm"
             )
+        else:
+            widgets[sid]["pos_var"].set("-")
 
     except Exception as e:
         print(f"Read error {sid}: {e}")
 
-    step = (step + 1) % 6
-    if step == 0:
-        current_index = (current_index + 1) % len(servos)
+    current_index = (current_index + 1) % len(servos)
     root.after(35, update_servos)
 
 # --- GUI ---
@@ -1,12 +1,20 @@
+import argparse
 from joystick.joystick_manager import JoystickManager
+from recording.session_recorder import SessionRecorder
 from ui.remote_ui import RemoteUI
 from camera.camera_handler import CameraHandler
 from detection.color_detection import ColorDetector
 from detection.strawberry_detection import StrawberryDetector
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record", metavar="FILE", help="record controller input, bus packets and camera frames to FILE")
+    args = parser.parse_args()
+    # Optional session recording, replay it with recording.session_replay
+    recorder = SessionRecorder(args.record).start() if args.record else None
+
     # Initialize the camera handler with the desired resolution
-    camera = CameraHandler(width=800, height=480)
+    camera = CameraHandler(width=800, height=480, recorder=recorder)
 
     # Create detectors dict
     detectors = {
@@ -14,16 +22,22 @@ if __name__ == "__main__":
         "strawberry": StrawberryDetector.detect_strawberries
     }
 
+    # The joystick manager also creates the motor manager after initializing the joysticks to avoid problems
+    joystickManager = JoystickManager(recorder=recorder)
+
     # Inject dependencies into UI (change width/height based on screen size)
     app = RemoteUI(
         width=800,
         height=480,
         camera_handler=camera,
         gripper_controller="",
-        detectors=detectors
+        detectors=detectors,
+        motor_manager=joystickManager.motorManager
     )
 
-    # Start the joystick manager so it starts listening for joystick input
-    # Also starts the motor manager after initializing the joysticks to avoid problems
-    joystickManager = JoystickManager()
-    joystickManager.start()
\ No newline at end of file
+    # Joystick input and motor control run on their own threads, the UI (with the STOP button) in the main thread
+    joystickManager.start()
+    app.run()
+    if recorder:
+        joystickManager.stop()
+        recorder.stop()
\ No newline at end of file
@@ -0,0 +1,77 @@
+import sys
+from time import perf_counter
+
+if "--sim" in sys.argv:
+    from motor import gpio_stub
+    gpio_stub.install()
+from motor.ax12 import Ax12
+
+# Round trip benchmark for the Ax12 driver.
+# Runs every command against the connected servos, first with the legacy fixed
+# TX delay and then with drain based timing, and prints the mean time per call.
+# Usage (from the repo root): python -m benchmarks.ax12_roundtrip [repeats] [--sim]
+# --sim runs against the virtual AX-12 bus instead of /dev/ttyAMA0.
+
+# Commands that are safe to send to a robot in wheel mode: (label, function(ax, ids))
+COMMANDS = [
+    ("ping", lambda ax, ids: [ax.ping(i) for i in ids]),
+    ("readPosition", lambda ax, ids: [ax.readPosition(i) for i in ids]),
+    ("readSpeed", lambda ax, ids: [ax.readSpeed(i) for i in ids]),
+    ("readLoad", lambda ax, ids: [ax.readLoad(i) for i in ids]),
+    ("readVoltage", lambda ax, ids: [ax.readVoltage(i) for i in ids]),
+    ("readTemperature", lambda ax, ids: [ax.readTemperature(i) for i in ids]),
+    ("readMovingStatus", lambda ax, ids: [ax.readMovingStatus(i) for i in ids]),
+    ("readState", lambda ax, ids: [ax.readState(i) for i in ids]),
+    ("setLedStatus", lambda ax, ids: [ax.setLedStatus(i, 0) for i in ids]),
+    ("stop", lambda ax, ids: [ax.stop(i) for i in ids]),
+    ("syncMoveSpeed", lambda ax, ids: ax.syncMoveSpeed({i: 0 for i in ids})),
+]
+
+
+# Mean seconds per call of every command, per servo (sync writes count once)
+def measure(ax, ids, repeats):
+    results = {}
+    for label, command in COMMANDS:
+        errors = 0
+        start = perf_counter()
+        for _ in range(repeats):
+            try:
+                command(ax, ids)
+            except (Ax12.timeoutError, Ax12.axError):
+                errors += 1
+        elapsed = perf_counter() - start
+        calls = repeats if label.startswith("sync") else repeats * len(ids)
+        results[label] = (elapsed / calls, errors)
+    return results
+
+
+def main():
+    args = [a for a in sys.argv[1:] if a != "--sim"]
+    repeats = int(args[0]) if args else 20
+    if "--sim" in sys.argv:
+        from motor.ax12_sim import VirtualAx12Bus
+        VirtualAx12Bus([2, 3, 4, 5, 6, 7]).start().connect()
+    ax = Ax12()
+    ids = ax.learnServos(1, 10)
+    if not ids:
+        print("No servos found.")
+        return
+    print(f"Servos: {ids}, {repeats} repeats per command")
+
+    Ax12.FIXED_TX_DELAY = True
+    before = measure(ax, ids, repeats)
+    Ax12.FIXED_TX_DELAY = False
+    Ax12.latency.clear()
+    after = measure(ax, ids, repeats)
+
+    print(f"{'command':<18}{'fixed ms':>10}{'drain ms':>10}{'speedup':>9}{'errors':>8}")
+    for label, _ in COMMANDS:
+        b, b_err = before[label]
+        a, a_err = after[label]
+        print(f"{label:<18}{b * 1000:>10.3f}{a * 1000:>10.3f}{b / a:>8.1f}x{b_err + a_err:>8}")
+    print("latency estimate per servo (ms):",
+          {i: round(Ax12.latency.get(i, 0) * 1000, 3) for i in ids})
+
+
+if __name__ == "__main__":
+    main()
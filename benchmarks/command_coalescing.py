@@ -0,0 +1,86 @@
+import math
+import random
+import sys
+from motor.ax12_sim import SIM_SERVO_CACHE_FILE, VirtualAx12Bus
+from joystick.joystick_registry import JoystickRegistry
+
+# Goal speed writes with and without command coalescing for the same joystick input.
+# The input is a file with one controller line per control tick as the firmware prints
+# it (",J1:x,y,sw,J2:x,y,sw" or with ToF pairs in front), or a generated session of slow
+# sweeps with ADC noise. Lines go through the controller parser, malformed ones (banner
+# text, half lines) count as ticks without new input.
+# "legacy" only drops speeds equal to the last one sent, like MotorManager used to.
+# Usage (from the repo root): python -m benchmarks.command_coalescing [session.txt]
+
+TICKS = 3000
+
+
+# A generated session: J1 sweeps slowly over the full range, J2 rests around the center
+# close to the deadband edges, all with a few ADC counts of noise
+def generated_session(ticks=TICKS, seed=1):
+    rng = random.Random(seed)
+    lines = []
+    for t in range(ticks):
+        sweep = int(2300 + 1790 * math.sin(t / 300))
+        x1 = min(4090, max(0, sweep + int(rng.gauss(0, 20))))
+        x2 = 2400 + int(rng.gauss(0, 30))
+        y2 = 2600 + int(400 * math.sin(t / 90)) + int(rng.gauss(0, 20))
+        lines.append(f"J1:{x2},{y2},0,J2:{x1},{x1},0")
+    return lines
+
+
+# Controller lines as bytes: the non empty lines of a recorded session, or the generated session
+def session_lines(path=None):
+    if path is None:
+        return [line.encode() for line in generated_session()]
+    with open(path, "rb") as f:
+        return [line for line in f if line.strip()]
+
+
+# The raw J1 axes (x, y) of every line the controller parser accepts
+def j1_axes(lines):
+    parser = JoystickRegistry()
+    axes = []
+    for line in lines:
+        if parser.update_from_bytes(line, 0.0):
+            joystick = parser.joysticks["J1"]
+            axes.append((joystick.x, joystick.y))
+    return axes
+
+
+def run(manager, registry, lines, coalescer):
+    manager.coalescer = coalescer
+    manager.forget_sent()
+    for line in lines:
+        registry.update_from_bytes(line)
+        manager.update_from_joysticks()
+    return coalescer.stats()
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    lines = session_lines(path)
+    valid = len(j1_axes(lines))
+    if not valid:
+        print(f"No controller lines in {path}")
+        return
+    bus = VirtualAx12Bus([2, 3, 4, 5, 6, 7]).start()
+    bus.connect()
+    from joystick.joystick_registry import registry
+    from motor.coalescer import CommandCoalescer
+    from motor.motor_manager import MotorManager
+    manager = MotorManager(cache_file=SIM_SERVO_CACHE_FILE)
+    worker = manager.registry.bus
+
+    print(f"{len(lines)} control ticks, {len(lines) - valid} malformed lines")
+    print(f"{'':<24}{'requested':>10}{'sent':>8}{'dropped':>9}{'packets':>9}")
+    for label, coalescer in (("legacy", CommandCoalescer(worker, 1, 0)),
+                             (f"quantum {manager.coalescer.quantum}, hyst. {manager.coalescer.hysteresis}",
+                              CommandCoalescer(worker, manager.coalescer.quantum, manager.coalescer.hysteresis))):
+        s = run(manager, registry, lines, coalescer)
+        print(f"{label:<24}{s['requested']:>10}{s['sent']:>8}{s['dropped']:>9}{s['packets']:>9}")
+    bus.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import random
+import sys
+from time import perf_counter
+from joystick.controller_protocol import encode_frame
+from joystick.joystick_reader import PROTOCOL_TEXT, JoystickReader
+from joystick.joystick_registry import JoystickRegistry
+
+# UART bytes and host decode time per controller update, text lines against binary
+# frames. The same generated updates (both joysticks and 0-3 ToF sensors) are encoded
+# both ways and fed to a JoystickReader one update per chunk, like they arrive.
+# Usage (from the repo root): python -m benchmarks.controller_protocol [updates]
+
+
+# Stand-in for the serial port, the reader only writes negotiation bytes to it
+class NullPort:
+    def write(self, data):
+        pass
+
+
+def generated_updates(count, seed=1):
+    rng = random.Random(seed)
+    for seq in range(count):
+        sensors = [(i, rng.randint(30, 2000)) for i in range(1, rng.randint(1, 4))]
+        j1 = (rng.randint(0, 4095), rng.randint(0, 4095), rng.randint(0, 1))
+        j2 = (rng.randint(0, 4095), rng.randint(0, 4095), rng.randint(0, 1))
+        yield seq, sensors, j1, j2
+
+
+# The controller's text line for an update
+def text_line(sensors, j1, j2):
+    pairs = ",".join(f"{i},{d}" for i, d in sensors)
+    return f"{pairs},J1:{j1[0]},{j1[1]},{j1[2]},J2:{j2[0]},{j2[1]},{j2[2]}\r\n".encode()
+
+
+def measure(chunks):
+    reader = JoystickReader(NullPort(), JoystickRegistry(), PROTOCOL_TEXT)
+    start = perf_counter()
+    for chunk in chunks:
+        reader.feed(chunk)
+    elapsed = perf_counter() - start
+    return sum(map(len, chunks)) / len(chunks), elapsed / len(chunks) * 1e6, reader.stats()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    updates = list(generated_updates(count))
+    text = [text_line(sensors, j1, j2) for _, sensors, j1, j2 in updates]
+    binary = [encode_frame(seq, seq * 10, j1, j2, sensors) for seq, sensors, j1, j2 in updates]
+    print(f"{count} updates")
+    print(f"{'':<8}{'bytes/update':>14}{'us/update':>11}")
+    results = {}
+    for label, chunks in (("text", text), ("binary", binary)):
+        size, micros, stats = measure(chunks)
+        results[label] = (size, micros)
+        print(f"{label:<8}{size:>14.1f}{micros:>11.2f}   parsed {stats['parsed']}, dropped {stats['dropped']}")
+    print(f"binary frames use {results['text'][0] / results['binary'][0]:.1f}x fewer bytes, "
+          f"decode {results['text'][1] / results['binary'][1]:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import sys
+from time import perf_counter, sleep
+from motor.ax12_sim import SIM_SERVO_CACHE_FILE, VirtualAx12Bus
+from motor.bus_worker import PRIORITY_TELEMETRY
+
+# Time from pressing STOP to the last servo stopping, on the virtual AX-12 bus (a pty
+# standing in for the UART). Every run first starts all servos and fills the bus queue
+# with telemetry reads, then stops the arm either servo by servo with Motor.stop() or
+# with the broadcast emergency stop of MotorManager.
+# Usage (from the repo root): python -m benchmarks.estop_latency [repeats]
+
+IDS = [2, 3, 4, 5, 6, 7]
+# Telemetry reads waiting in the bus queue when STOP is pressed
+QUEUED_READS = 20
+
+
+# Time after start at which the last of ids had its goal speed set to 0, None if one did not stop
+def last_stop(bus, ids, start, address):
+    stopped = {}
+    for t, servo_id, register, value in bus.motion_log:
+        if t > start and servo_id in ids and register == address and value == 0:
+            stopped.setdefault(servo_id, t)
+    return max(stopped.values()) - start if len(stopped) == len(ids) else None
+
+
+def run(manager, bus, stop):
+    worker = manager.registry.bus
+    worker.syncMoveSpeed({i: 300 for i in IDS})
+    reads = [worker.submit(PRIORITY_TELEMETRY, worker.ax.readState, IDS[n % len(IDS)]) for n in range(QUEUED_READS)]
+    start = perf_counter()
+    stop()
+    for future in reads:
+        future.result()
+    sleep(0.01)
+    return last_stop(bus, IDS, start, manager.registry.ax.AX_GOAL_SPEED_L)
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    bus = VirtualAx12Bus(IDS, record=True).start()
+    bus.connect()
+    from motor.motor_manager import MotorManager
+    manager = MotorManager(cache_file=SIM_SERVO_CACHE_FILE)
+    motors = list(manager.registry.motors.values())
+
+    def per_servo():
+        for motor in motors:
+            motor.stop()
+
+    def emergency():
+        manager.emergency_stop()
+
+    results = {"Motor.stop() per servo": [], "broadcast e-stop": []}
+    for _ in range(repeats):
+        results["Motor.stop() per servo"].append(run(manager, bus, per_servo))
+        results["broadcast e-stop"].append(run(manager, bus, emergency))
+        manager.release_emergency_stop()
+
+    for label, latencies in results.items():
+        latencies = sorted(t for t in latencies if t is not None)
+        print(f"{label:<24} mean {sum(latencies) / len(latencies) * 1000:.3f} ms, "
+              f"max {latencies[-1] * 1000:.3f} ms ({len(latencies)}/{repeats} runs)")
+    bus.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import sys
+from time import perf_counter
+from motor.ax12_sim import SIM_SERVO_CACHE_FILE, VirtualAx12Bus
+from benchmarks.command_coalescing import j1_axes, session_lines
+from joystick.filters import FILTERS, make_filter
+
+# Goal speed writes and joystick change events per input filter for the same joystick
+# input, with the default command coalescing. The input is a file with one controller
+# line per control tick (as the firmware prints them, 100 lines/s), or the generated
+# session of command_coalescing. "lag" is the mean distance in ADC counts between the
+# filtered and the raw values, the price paid for the smoothing; "us/update" the time
+# to filter both axes of one joystick.
+# Usage (from the repo root): python -m benchmarks.joystick_filters [session.txt]
+
+# Seconds between recorded lines
+LINE_PERIOD = 0.01
+
+
+def run(manager, registry, lines, axes, kind):
+    from motor.coalescer import CommandCoalescer
+    filters = {name: make_filter(kind) for name in registry.joysticks}
+    for name, joystick_filter in filters.items():
+        registry.set_filter(name, joystick_filter)
+    old = manager.coalescer
+    manager.coalescer = CommandCoalescer(old.bus, old.quantum, old.hysteresis)
+    manager.forget_sent()
+    changes = registry.changes
+    lag = 0
+    for i, line in enumerate(lines):
+        now = i * LINE_PERIOD
+        registry.update_from_bytes(line, now)
+        manager.update_from_joysticks()
+        for name, f in filters.items():
+            joystick = registry.joysticks[name]
+            lag += abs(f.x.values[f.x.index - 1] - joystick.x) + abs(f.y.values[f.y.index - 1] - joystick.y)
+    # Filter cost on its own, the raw J1 axes of the same lines through a fresh filter
+    timing = make_filter(kind)
+    start = perf_counter()
+    for i, (x, y) in enumerate(axes):
+        timing.apply(x, y, i * LINE_PERIOD)
+    filter_time = (perf_counter() - start) / len(axes)
+    for name in filters:
+        registry.set_filter(name, None)
+    return manager.coalescer.stats(), registry.changes - changes, lag / (len(lines) * 4), filter_time
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    lines = session_lines(path)
+    axes = j1_axes(lines)
+    if not axes:
+        print(f"No controller lines in {path}")
+        return
+    bus = VirtualAx12Bus([2, 3, 4, 5, 6, 7]).start()
+    bus.connect()
+    from joystick.joystick_registry import registry
+    from motor.motor_manager import MotorManager
+    manager = MotorManager(cache_file=SIM_SERVO_CACHE_FILE)
+
+    print(f"{len(lines)} control ticks, {len(lines) - len(axes)} malformed lines")
+    print(f"{'':<10}{'sent':>8}{'packets':>9}{'events':>8}{'lag':>7}{'us/update':>11}")
+    baseline = None
+    for kind in FILTERS:
+        s, events, lag, filter_time = run(manager, registry, lines, axes, kind)
+        baseline = baseline or s["sent"]
+        print(f"{kind:<10}{s['sent']:>8}{s['packets']:>9}{events:>8}{lag:>7.1f}{filter_time * 1e6:>11.1f}"
+              f"  ({1 - s['sent'] / baseline:.0%} fewer writes)")
+    bus.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import random
+import sys
+from time import perf_counter
+from joystick.joystick_registry import JoystickRegistry
+
+# Lines per second of the controller line parser: the old str based parser against
+# JoystickRegistry.update_from_bytes, on a capture of the controller's serial output
+# (one line per controller message) or on generated lines in the firmware format.
+# The old parser skips the ToF pairs and only swaps the joysticks. update_from_bytes also
+# stores the ToF pairs with their receive time, runs the input filters and counts
+# changes, and runs at about 0.8-0.9x the old rate. It gains the ToF data and the
+# malformed line counters, not speed. The parse only row leaves that extra work out.
+# Usage (from the repo root): python -m benchmarks.joystick_parser [capture.txt] [repeats]
+
+LINES = 20000
+
+
+# The controller parser as it was: decode, split on commas and walk the tokens
+def legacy_update_from_serial(registry, line):
+    parts = line.strip().split(",")
+    i = 0
+    while i < len(parts):
+        if parts[i].startswith("J"):
+            try:
+                label, x = parts[i].split(":")
+                y = int(parts[i + 1])
+                pressed = int(parts[i + 2])
+                x = int(x)
+                if label in registry.joysticks:
+                    registry.joysticks[label] = registry.joysticks[label].updated(x, y, pressed, 0.0)
+                i += 3
+            except Exception as e:
+                print(f"Invalid joystick data at index {i}: {parts[i]} - {e}")
+                i += 1
+        else:
+            i += 1
+
+
+# Lines like the firmware prints them: 0-3 ToF id,distance pairs and both joysticks
+def generated_capture(count=LINES, seed=1):
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        sensors = "".join(f"{i},{rng.randint(30, 2000)}," for i in range(1, rng.randint(1, 4)))
+        joysticks = ",".join(f"J{n}:{rng.randint(0, 4095)},{rng.randint(0, 4095)},{rng.randint(0, 1)}" for n in (1, 2))
+        lines.append(f"{sensors or ','}{joysticks}\r\n".encode())
+    return lines
+
+
+# The field splitting and int conversions of update_from_bytes, without storing anything
+def parse_only(line):
+    parts = line.split(b",")
+    n = len(parts) - 6
+    if n < 0 or not parts[n].startswith(b"J1:") or not parts[n + 3].startswith(b"J2:"):
+        return None
+    start = 1 if n and not parts[0] else 0
+    joysticks = (int(parts[n][3:]), int(parts[n + 1]), int(parts[n + 2]),
+                 int(parts[n + 3][3:]), int(parts[n + 4]), int(parts[n + 5]))
+    return joysticks, [(int(parts[i]), int(parts[i + 1])) for i in range(start, n, 2)]
+
+
+def measure(parse, lines, repeats):
+    start = perf_counter()
+    for _ in range(repeats):
+        for line in lines:
+            parse(line)
+    return len(lines) * repeats / (perf_counter() - start)
+
+
+def main():
+    args = sys.argv[1:]
+    if args and not args[0].isdigit():
+        with open(args.pop(0), "rb") as f:
+            lines = [line for line in f if line.strip()]
+    else:
+        lines = generated_capture()
+    repeats = int(args[0]) if args else 5
+
+    legacy = JoystickRegistry()
+    registry = JoystickRegistry()
+    old = measure(lambda line: legacy_update_from_serial(legacy, line.decode("utf-8")), lines, repeats)
+    new = measure(registry.update_from_bytes, lines, repeats)
+    parse = measure(parse_only, lines, repeats)
+    print(f"{len(lines)} lines x {repeats}")
+    print(f"{'legacy str parser':<22}{old:>12.0f} lines/s")
+    print(f"{'update_from_bytes':<22}{new:>12.0f} lines/s  ({new / old:.2f}x)")
+    print(f"{'  parse only':<22}{parse:>12.0f} lines/s  ({parse / old:.2f}x)")
+    print("parser counters:", registry.stats(), "ToF sensors seen:", sorted(registry.sensors.readings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import sys
+from motor.ax12_sim import SIM_SERVO_CACHE_FILE, VirtualAx12Bus
+
+# Start skew of the two lift motors: one moveSpeed per motor versus a MotionGroup
+# (REG_WRITE + one ACTION). The virtual bus timestamps the packets it receives and
+# logs when each servo's goal registers change; the skew is the time between the
+# first and the last servo of the pair starting.
+# Usage (from the repo root): python -m benchmarks.motion_skew [repeats]
+
+LIFT = ("up_down_motor_1", "up_down_motor_2")
+
+
+# Time between the first and the last servo of ids getting a new goal after time start
+def start_skew(bus, ids, start):
+    first = {}
+    for t, servo_id, _, _ in bus.motion_log:
+        if t > start and servo_id in ids and servo_id not in first:
+            first[servo_id] = t
+    return max(first.values()) - min(first.values()) if len(first) == len(ids) else None
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    bus = VirtualAx12Bus([2, 3, 4, 5, 6, 7], record=True).start()
+    bus.connect()
+    from motor.motion_group import MotionGroup
+    from motor.motor_registry import MotorRegistry
+    registry = MotorRegistry(SIM_SERVO_CACHE_FILE)
+    motors = [registry.get(name) for name in LIFT]
+    ids = {m.id for m in motors}
+    group = MotionGroup(motors)
+
+    results = {"sequential": [], "motion group": []}
+    for i in range(repeats):
+        speed = 100 + i % 2 * 100
+        start = bus.received[-1][0] if bus.received else 0
+        for motor in motors:
+            motor.ctrl.moveSpeed(motor.id, 0, speed)
+        results["sequential"].append(start_skew(bus, ids, start))
+
+        speed += 300
+        start = bus.received[-1][0]
+        group.stage_all(None, speed)
+        group.release()
+        results["motion group"].append(start_skew(bus, ids, start))
+
+    for label, skews in results.items():
+        skews = [s for s in skews if s is not None]
+        print(f"{label:<14} mean skew {sum(skews) / len(skews) * 1000:.3f} ms, "
+              f"max {max(skews) * 1000:.3f} ms ({len(skews)} moves)")
+    bus.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import argparse
+import os
+import tempfile
+from motor.ax12_sim import SIM_SERVO_CACHE_FILE, VirtualAx12Bus
+from motor.ax12 import PacketParser
+from benchmarks.command_coalescing import generated_session
+from joystick.joystick_reader import PROTOCOL_TEXT, JoystickReader
+from recording.session_recorder import BUS_TX, CONTROLLER, FRAME, SessionRecorder
+from recording.session_replay import AS_FAST_AS_POSSIBLE, REAL_TIME, SessionReplay
+
+# Replays a recorded session (python app.py --record FILE) through the real code: the
+# controller bytes through JoystickReader, the registry and MotorManager on the virtual
+# AX-12 bus, the camera frames through the detectors (needs OpenCV). Prints the
+# throughput and handler time per stream, and the bus packets the recording holds next
+# to the ones the replay sent. Without a file a session is first recorded from the
+# generated joystick input of command_coalescing.
+# Usage (from the repo root): python -m benchmarks.session_replay [session.bin] [--realtime] [--frames]
+
+IDS = [2, 3, 4, 5, 6, 7]
+# Lines of the generated session
+LINES = 1000
+
+
+# Counts the packets the replay puts on the bus (stands in for the recorder of Ax12)
+class PacketCounter:
+    def __init__(self):
+        self.packets = 0
+        self.bytes = 0
+
+    def bus(self, packet):
+        self.packets += 1
+        self.bytes += len(packet)
+
+
+# Record a session from generated joystick lines, fed through the reader like the serial port would
+def record_generated(path, manager, reader):
+    recorder = SessionRecorder(path).start()
+    manager.registry.ax.setRecorder(recorder)
+    for line in generated_session(LINES):
+        data = (line + "\r\n").encode()
+        recorder.controller(data)
+        reader.feed(data)
+        manager.update_from_joysticks()
+    manager.registry.ax.setRecorder(None)
+    recorder.stop()
+    return recorder.stats()
+
+
+# Handler that decodes the JPEG frames and runs the detectors on them
+def frame_handler():
+    import cv2
+    import numpy as np
+    from detection.color_detection import ColorDetector
+    from detection.strawberry_detection import StrawberryDetector
+    color = ColorDetector()
+    strawberry = StrawberryDetector()
+
+    def handle(record, now):
+        frame = cv2.imdecode(np.frombuffer(record.data, np.uint8), cv2.IMREAD_COLOR)
+        color.detect_objects(frame.copy(), None, None)
+        strawberry.detect(strawberry, frame)
+    return handle
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("session", nargs="?")
+    parser.add_argument("--realtime", action="store_true", help="replay at the recorded pace")
+    parser.add_argument("--frames", action="store_true", help="run the detectors on the recorded frames")
+    args = parser.parse_args()
+
+    bus = VirtualAx12Bus(IDS).start()
+    bus.connect()
+    from joystick.joystick_registry import registry
+    from motor.motor_manager import MotorManager
+    manager = MotorManager(cache_file=SIM_SERVO_CACHE_FILE)
+    reader = JoystickReader(None, registry, PROTOCOL_TEXT)
+
+    path = args.session
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), "generated_session.bin")
+        print("recorded", record_generated(path, manager, reader), "to", path)
+        manager.forget_sent()
+        reader = JoystickReader(None, registry, PROTOCOL_TEXT)
+
+    # Recorded bus packets go through the packet parser, the controller stream through the
+    # reader and the motor manager, which sends its own packets to the virtual bus
+    recorded = PacketParser()
+    recorded_packets = 0
+
+    def on_bus(record, now):
+        nonlocal recorded_packets
+        recorded.feed(record.data)
+        while recorded.next() is not None:
+            recorded_packets += 1
+
+    def on_controller(record, now):
+        reader.feed(record.data, now)
+        manager.update_from_joysticks()
+
+    sent = PacketCounter()
+    manager.registry.ax.setRecorder(sent)
+    replay = SessionReplay(path, REAL_TIME if args.realtime else AS_FAST_AS_POSSIBLE)
+    replay.on(CONTROLLER, on_controller).on(BUS_TX, on_bus)
+    if args.frames:
+        replay.on(FRAME, frame_handler())
+    stats = replay.run()
+    manager.registry.ax.setRecorder(None)
+
+    print(f"session {stats['duration']:.2f} s replayed in {stats['wall_time']:.2f} s"
+          f" ({'real time' if args.realtime else 'as fast as possible'})")
+    print(f"{'':<12}{'records':>9}{'bytes':>10}{'per s':>10}{'mean ms':>9}{'p99 ms':>8}{'max ms':>8}")
+    for name, kind in stats["kinds"].items():
+        h = kind["handler_ms"]
+        print(f"{name:<12}{kind['records']:>9}{kind['bytes']:>10}{kind['per_second']:>10.0f}"
+              f"{h['mean']:>9.3f}{h['p99']:>8.3f}{h['max']:>8.3f}")
+    if args.realtime:
+        print("late ms", stats["late_ms"])
+    print(f"bus packets: {recorded_packets} recorded, {sent.packets} sent by the replay")
+    print("reader:", {key: value for key, value in reader.stats().items() if key in ("lines", "frames", "parsed", "dropped")})
+    bus.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import sys
+from time import perf_counter
+from motor.ax12_sim import SIM_SERVO_CACHE_FILE, VirtualAx12Bus
+
+# Commands per second and latency of the motor stack against the virtual AX-12 bus,
+# no robot needed. Usage (from the repo root): python -m benchmarks.virtual_bus [seconds]
+
+IDS = [2, 3, 4, 5, 6, 7]
+
+
+# Run command() for the given time, returns (calls per second, latency percentiles in ms)
+def run_for(seconds, command):
+    samples = []
+    end = perf_counter() + seconds
+    while perf_counter() < end:
+        start = perf_counter()
+        command()
+        samples.append(perf_counter() - start)
+    samples.sort()
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    return len(samples) / seconds, pick(0.5), pick(0.99)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    bus = VirtualAx12Bus(IDS).start()
+    Ax12 = bus.connect()
+    ax = Ax12()
+    # measure the bus itself, not the register shadow skipping repeated writes
+    Ax12.SHADOW_WRITES = False
+
+    commands = [
+        ("ping", lambda: ax.ping(3)),
+        ("readPosition", lambda: ax.readPosition(3)),
+        ("readLoad", lambda: ax.readLoad(3)),
+        ("readState", lambda: ax.readState(3)),
+        ("moveSpeed", lambda: ax.moveSpeed(3, 0, 100)),
+        ("syncMoveSpeed x6", lambda: ax.syncMoveSpeed({i: 100 for i in IDS})),
+    ]
+    print(f"{'command':<20}{'per s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for label, command in commands:
+        rate, p50, p99 = run_for(seconds, command)
+        print(f"{label:<20}{rate:>10.0f}{p50:>10.3f}{p99:>10.3f}")
+
+    # The full control path: joystick values in, one MotorManager update per call
+    from joystick.joystick_registry import registry
+    from motor.motor_manager import MotorManager
+    Ax12.SHADOW_WRITES = True
+    manager = MotorManager(cache_file=SIM_SERVO_CACHE_FILE)
+    values = [0, 1000, 2300, 3000, 4090]
+    tick = [0]
+
+    def update():
+        tick[0] += 1
+        v = values[tick[0] % len(values)]
+        registry.update_from_serial(f"J1:{v},{v},0,J2:{v},{v},0")
+        manager.update_from_joysticks()
+    rate, p50, p99 = run_for(seconds, update)
+    print(f"{'MotorManager update':<20}{rate:>10.0f}{p50:>10.3f}{p99:>10.3f}")
+    print("bus:", bus.stats)
+    bus.stop()
+
+
+if __name__ == "__main__":
+    main()
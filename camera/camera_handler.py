@@ -1,10 +1,24 @@
 import requests
 import cv2
+
+# JPEG quality of recorded frames
+RECORD_JPEG_QUALITY = 80
+
+
+# Encode a frame as JPEG bytes for the session recorder
+def encode_jpeg(frame):
+    ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, RECORD_JPEG_QUALITY])
+    if not ok:
+        raise ValueError("Could not encode frame as JPEG")
+    return jpeg.tobytes()
+
 # CameraHandler class to manage camera operations for the ESP32-CAM module
 class CameraHandler:
     # Initialize the camera
     # The camera is configured to stream at a specified resolution and URL, it has its own acces point
-    def __init__(self, width=800, height=480, stream_url='http://192.168.4.1:81/stream', base_url='http://192.168.4.1'):
+    # recorder (a recording.SessionRecorder) gets every frame that is read
+    def __init__(self, width=800, height=480, stream_url='http://192.168.4.1:81/stream', base_url='http://192.168.4.1',
+                 recorder=None):
         self.width = width
         self.height = height
         self.stream_url = stream_url
@@ -15,6 +29,7 @@ class CameraHandler:
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
         self.camera_on = False
+        self.recorder = recorder
         self.configure_camera()
 
     # configuring some of the internal settings of the camera (via http requests)
@@ -46,6 +61,8 @@ class CameraHandler:
     def read_frame(self):
         if self.cap.isOpened() and self.camera_on:
             ret, frame = self.cap.read()
+            if ret and self.recorder is not None:
+                self.recorder.frame(frame, encode_jpeg)
             return ret, frame
         return False, None
 
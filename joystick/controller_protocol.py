@@ -0,0 +1,73 @@
+import binascii
+import struct
+from collections import namedtuple
+
+# Binary frames of the smart controller, the compact alternative to its text lines.
+# All values are little endian:
+#
+#   0  sync      A5 5A
+#   2  seq       uint8, +1 per ESP-NOW packet the sensor ESP sent, so a gap is a packet
+#                lost on the radio link or on the UART
+#   3  time      uint16, sensor ESP millis() when it read the distances (wraps every 65.5 s)
+#   5  flags     bits 0-3 number of ToF entries, bit 4 J1 pressed, bit 5 J2 pressed
+#   6  axes      J1 x, J1 y, J2 x, J2 y as 12 bit values in 6 bytes (x1 | y1 << 12 | x2 << 24 | y2 << 36)
+#  12  ToF       per entry id (uint8) and distance (uint16)
+#   .  crc       uint16 CRC-16/CCITT (binascii.crc_hqx, start 0xFFFF) of everything after the sync
+#
+# A frame is 14 bytes plus 3 per ToF entry; the same update as text takes about 35-45.
+# The text format never contains the sync bytes, so both can arrive on the same port.
+
+SYNC = b"\xa5\x5a"
+HEADER = struct.Struct("<2sBHB")
+AXES_SIZE = 6
+SENSOR = struct.Struct("<BH")
+CRC = struct.Struct("<H")
+# Offset of the ToF entries and size of a frame without them
+SENSORS_OFFSET = HEADER.size + AXES_SIZE
+FRAME_SIZE = SENSORS_OFFSET + CRC.size
+MAX_SENSORS = 15
+CRC_START = 0xFFFF
+
+# Commands sent to the controller to switch its output format
+MODE_BINARY = b"B"
+MODE_TEXT = b"T"
+
+# A decoded frame, j1 and j2 are (x, y, pressed), sensors ((id, distance), ...)
+ControllerFrame = namedtuple("ControllerFrame", ["seq", "time", "j1", "j2", "sensors"])
+
+
+# Build a frame, the controller does the same in C
+def encode_frame(seq, time, j1, j2, sensors=()):
+    sensors = tuple(sensors)[:MAX_SENSORS]
+    flags = len(sensors) | (0x10 if j1[2] else 0) | (0x20 if j2[2] else 0)
+    body = bytearray(HEADER.pack(SYNC, seq & 0xFF, time & 0xFFFF, flags))
+    axes = (j1[0] & 0xFFF) | (j1[1] & 0xFFF) << 12 | (j2[0] & 0xFFF) << 24 | (j2[1] & 0xFFF) << 36
+    body += axes.to_bytes(AXES_SIZE, "little")
+    for sensor_id, distance in sensors:
+        body += SENSOR.pack(sensor_id, distance)
+    body += CRC.pack(binascii.crc_hqx(memoryview(body)[2:], CRC_START))
+    return bytes(body)
+
+
+# Decode the frame starting at offset (the start of a sync word) in data.
+# Returns (frame, size): (None, 0) when data does not hold the whole frame yet,
+# (None, size) when the checksum is wrong.
+def decode_frame(data, offset=0):
+    available = len(data) - offset
+    if available < FRAME_SIZE:
+        return None, 0
+    flags = data[offset + 5]
+    count = flags & 0x0F
+    size = FRAME_SIZE + count * SENSOR.size
+    if available < size:
+        return None, 0
+    end = offset + size - CRC.size
+    # Everything the checksum covers: seq, time, flags, axes and ToF entries
+    body = data[offset + 2:end]
+    if binascii.crc_hqx(body, CRC_START) != data[end] | data[end + 1] << 8:
+        return None, size
+    axes = int.from_bytes(body[4:10], "little")
+    sensors = tuple(SENSOR.iter_unpack(body[10:])) if count else ()
+    return ControllerFrame(body[0], body[1] | body[2] << 8,
+                           (axes & 0xFFF, axes >> 12 & 0xFFF, flags >> 4 & 1),
+                           (axes >> 24 & 0xFFF, axes >> 36 & 0xFFF, flags >> 5 & 1), sensors), size
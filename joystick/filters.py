@@ -0,0 +1,159 @@
+import math
+import numpy as np
+
+# Filters for the raw joystick ADC values, applied by the JoystickRegistry before it
+# decides whether a joystick changed. Every axis keeps its last values in a fixed size
+# NumPy ring buffer; filtering and the window statistics work on that buffer (and a
+# scratch buffer of the same size) without allocating arrays per update.
+
+# Values kept per axis
+WINDOW = 5
+# Weight of a new value in the exponential moving average
+EMA_ALPHA = 0.3
+# One euro filter: cutoff (Hz) at rest, how fast the cutoff rises with the speed
+# (per ADC count per second) and the cutoff of the speed estimate
+ONE_EURO_MIN_CUTOFF = 1.0
+ONE_EURO_BETA = 0.005
+ONE_EURO_D_CUTOFF = 1.0
+# Time between updates assumed for the first one, the controller sends about 100 lines/s
+DEFAULT_DT = 0.01
+
+
+# AxisFilter keeps the history of one axis and passes values through unchanged
+class AxisFilter:
+    def __init__(self, window=WINDOW):
+        self.values = np.zeros(window, dtype=np.float64)
+        self.index = 0
+        self.count = 0
+
+    # Add a raw value at monotonic time now and return the filtered value
+    def filter(self, value, now):
+        self.values[self.index] = value
+        self.index = (self.index + 1) % len(self.values)
+        self.count += 1
+        return self._filter(value, now)
+
+    def _filter(self, value, now):
+        return value
+
+    # The raw values in the buffer as a view, in ring order rather than by age
+    def window(self):
+        return self.values[:min(self.count, len(self.values))]
+
+    def reset(self):
+        self.index = 0
+        self.count = 0
+
+    # Mean, standard deviation and range of the raw values in the window
+    def stats(self):
+        window = self.window()
+        if not len(window):
+            return {"count": 0, "mean": 0.0, "std": 0.0, "min": 0.0, "max": 0.0}
+        return {
+            "count": self.count,
+            "mean": float(window.mean()),
+            "std": float(window.std()),
+            "min": float(window.min()),
+            "max": float(window.max()),
+        }
+
+
+# Median of the last window values, removes single spikes and keeps edges sharp
+class MedianFilter(AxisFilter):
+    def __init__(self, window=WINDOW):
+        super().__init__(window)
+        self._scratch = np.empty_like(self.values)
+
+    def _filter(self, value, now):
+        n = min(self.count, len(self.values))
+        scratch = self._scratch[:n]
+        scratch[:] = self.values[:n]
+        scratch.partition(n // 2)
+        return int(scratch[n // 2])
+
+
+# Exponential moving average, alpha is the weight of the new value
+class EmaFilter(AxisFilter):
+    def __init__(self, window=WINDOW, alpha=EMA_ALPHA):
+        super().__init__(window)
+        self.alpha = alpha
+        self.state = None
+
+    def _filter(self, value, now):
+        if self.state is None:
+            self.state = float(value)
+        else:
+            self.state += self.alpha * (value - self.state)
+        return int(round(self.state))
+
+    def reset(self):
+        super().reset()
+        self.state = None
+
+
+# One euro filter (Casiez et al.): a low pass filter whose cutoff rises with the speed
+# of the stick, smooth at rest and little lag when the stick is moved quickly
+class OneEuroFilter(AxisFilter):
+    def __init__(self, window=WINDOW, min_cutoff=ONE_EURO_MIN_CUTOFF, beta=ONE_EURO_BETA, d_cutoff=ONE_EURO_D_CUTOFF):
+        super().__init__(window)
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.state = None
+        self.speed = 0.0
+        self.last_time = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def _filter(self, value, now):
+        if self.state is None:
+            self.state = float(value)
+            self.last_time = now
+            return value
+        dt = now - self.last_time
+        if dt <= 0:
+            dt = DEFAULT_DT
+        self.last_time = now
+        speed = (value - self.state) / dt
+        self.speed += self._alpha(self.d_cutoff, dt) * (speed - self.speed)
+        cutoff = self.min_cutoff + self.beta * abs(self.speed)
+        self.state += self._alpha(cutoff, dt) * (value - self.state)
+        return int(round(self.state))
+
+    def reset(self):
+        super().reset()
+        self.state = None
+        self.speed = 0.0
+        self.last_time = None
+
+
+FILTERS = {"none": AxisFilter, "median": MedianFilter, "ema": EmaFilter, "one_euro": OneEuroFilter}
+
+
+# JoystickFilter filters both axes of one joystick, the button is passed through
+class JoystickFilter:
+    def __init__(self, x: AxisFilter, y: AxisFilter):
+        self.x = x
+        self.y = y
+
+    # Filtered (x, y) for raw values received at monotonic time now
+    def apply(self, x, y, now):
+        return self.x.filter(x, now), self.y.filter(y, now)
+
+    def reset(self):
+        self.x.reset()
+        self.y.reset()
+
+    def stats(self):
+        return {"x": self.x.stats(), "y": self.y.stats()}
+
+
+# Builds a JoystickFilter of one of the FILTERS kinds, options go to both axis filters
+def make_filter(kind, **options):
+    if kind not in FILTERS:
+        raise ValueError(f"Unknown joystick filter {kind!r}, expected one of {', '.join(FILTERS)}")
+    cls = FILTERS[kind]
+    return JoystickFilter(cls(**options), cls(**options))
@@ -1,18 +1,21 @@
-# Joystick class for handling joystick input
+# Joystick class for handling joystick input. A Joystick is a value: the registry
+# publishes a new one for every change instead of changing the old one, so a listener
+# can keep the state it was given.
 class Joystick:
-    # Joystick data and state
-    def __init__(self, name):
-        self.name = name
-        self.x = 0
-        self.y = 0
-        self.pressed = 0
+    __slots__ = ("name", "x", "y", "pressed", "timestamp")
 
-    # Update joystick state with new x, y coordinates and pressed state
-    def update(self, x, y, pressed):
+    # Joystick data and state, timestamp is the monotonic time of the update
+    def __init__(self, name, x=0, y=0, pressed=0, timestamp=0.0):
+        self.name = name
         self.x = x
         self.y = y
         self.pressed = pressed
+        self.timestamp = timestamp
+
+    # A copy of this joystick with new x, y coordinates and pressed state
+    def updated(self, x, y, pressed, timestamp):
+        return Joystick(self.name, x, y, pressed, timestamp)
 
     # Get the current state of the joystick
     def __repr__(self):
-        return f"<{self.name}: x={self.x}, y={self.y}, pressed={self.pressed}>"
\ No newline at end of file
+        return f"<{self.name}: x={self.x}, y={self.y}, pressed={self.pressed}>"
@@ -1,29 +1,44 @@
 import serial
-import threading
-import time
+from joystick.filters import make_filter
+from joystick.joystick_reader import PROTOCOL_AUTO, JoystickReader
 from joystick.joystick_registry import registry
-from motor.motor_manager import MotorManager
+from motor.motor_manager import CONTROL_RATE, ControlLoop, MotorManager
 
 # JoystickManager class for managing joystick input and sending input to motors
 class JoystickManager:
     #
-    def __init__(self, port='/dev/ttyAMA2', baudrate=115200):
-        self.motorManager = MotorManager()
-        self.serial = serial.Serial(port, baudrate, timeout=1)
+    def __init__(self, port='/dev/ttyAMA2', baudrate=115200, control_rate=CONTROL_RATE, protocol=PROTOCOL_AUTO,
+                 input_filter=None, recorder=None, **filter_options):
+        # Smooth the joystick axes before they are mapped to speeds ("median", "ema" or "one_euro")
+        if input_filter:
+            for name in registry.joysticks:
+                registry.set_filter(name, make_filter(input_filter, **filter_options))
+        # recorder (a recording.SessionRecorder) records the controller input and the bus packets
+        self.motorManager = MotorManager(recorder=recorder)
+        # The motors are updated at a fixed rate from the latest joystick state
+        self.controlLoop = ControlLoop(self.motorManager, control_rate)
+        # A short timeout so the reader thread notices stop() quickly
+        self.serial = serial.Serial(port, baudrate, timeout=0.05)
+        # Reads the controller on its own thread and keeps the newest joystick state in the registry,
+        # with binary frames when the controller supports them
+        self.reader = JoystickReader(self.serial, registry, protocol)
+        self.reader.recorder = recorder
         self.running = False
-        self.thread = None
 
     def start(self):
         if not self.running:
             self.running = True
-            self._poll_loop()
+            self.controlLoop.start()
+            self.motorManager.telemetry.start()
+            self.reader.start()
 
     def stop(self):
         self.running = False
+        self.reader.stop()
+        self.controlLoop.stop()
+        self.motorManager.telemetry.stop()
 
-    def _poll_loop(self):
-        while self.running:
-            time.sleep(0.1)
-            line = self.serial.readline().decode("utf-8")
-            registry.update_from_serial(line)
-            self.motorManager.update_from_joysticks()
+    # Reader, control loop and speed governor statistics
+    def stats(self):
+        return {"reader": self.reader.stats(), "control": self.controlLoop.stats(),
+                "governor": self.motorManager.governor.stats()}
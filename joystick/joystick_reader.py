@@ -0,0 +1,217 @@
+import threading
+import time
+from joystick.controller_protocol import MODE_BINARY, MODE_TEXT, SYNC, decode_frame
+from joystick.joystick_registry import JoystickRegistry
+
+# Longest line the controller sends, anything longer without a newline is garbage
+MAX_LINE_LENGTH = 512
+# Seconds to wait for binary frames after asking the controller for them
+NEGOTIATE_TIMEOUT = 1.0
+# Requests without an answer before deciding the controller only speaks text
+NEGOTIATE_ATTEMPTS = 3
+
+# Controller protocols: text lines only, binary frames when the controller supports
+# them (falls back to text), or always ask for binary frames
+PROTOCOL_TEXT = "text"
+PROTOCOL_AUTO = "auto"
+PROTOCOL_BINARY = "binary"
+
+
+# JoystickReader reads the controller's serial port on its own thread. It takes every
+# byte that has arrived as soon as it arrives, splits off the complete text lines and
+# binary frames (see controller_protocol) and only applies the newest one: each update
+# holds the full state of both joysticks, so older ones still waiting in the same chunk
+# are out of date and are counted as dropped. Their button changes are still applied
+# first, so a press and release that arrive in one chunk are not lost.
+#
+# Unless the protocol is text, the reader asks the controller for binary frames and
+# keeps using text lines when no frame comes back. The sensor ESP numbers its radio
+# packets and the controller passes the number on in every frame, so gaps in the frame
+# sequence numbers (packets lost on the radio link or the UART) are counted in seq_lost.
+class JoystickReader:
+    def __init__(self, port, registry: JoystickRegistry, protocol=PROTOCOL_AUTO):
+        self.port = port
+        self.registry = registry
+        self.protocol = protocol
+        # Format the controller is sending, "text" until the first binary frame
+        self.mode = PROTOCOL_TEXT
+        self.running = False
+        self.thread = None
+        # Session recorder that gets every chunk read from the port (see recording/)
+        self.recorder = None
+        self._buffer = b""
+        self._requested_at = None
+        self._requests = 0
+        self.lines = 0
+        self.frames = 0
+        self.parsed = 0
+        self.dropped = 0
+        self.crc_errors = 0
+        self.seq_lost = 0
+        self.last_seq = None
+        # Sensor ESP time (ms) of the newest frame
+        self.last_time = None
+        # Monotonic time the newest update was applied
+        self.last_line = 0.0
+        self._rate_start = time.monotonic()
+        self._rate_lines = 0
+        # Lines or frames per second
+        self.lines_per_second = 0.0
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            if self.protocol != PROTOCOL_TEXT:
+                self.request_binary()
+            self.thread = threading.Thread(target=self._run, name="joystick-reader", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+        # Leave the controller in its default format for the next program
+        if self.mode != PROTOCOL_TEXT:
+            self.port.write(MODE_TEXT)
+            self.mode = PROTOCOL_TEXT
+
+    # Ask the controller to send binary frames
+    def request_binary(self):
+        self.port.write(MODE_BINARY)
+        self._requested_at = time.monotonic()
+        self._requests += 1
+
+    def _run(self):
+        port = self.port
+        while self.running:
+            # Blocks until at least one byte arrived (or the port timeout), then takes the rest
+            data = port.read(port.in_waiting or 1)
+            if data:
+                if self.recorder is not None:
+                    self.recorder.controller(data)
+                self.feed(data)
+
+    # Add received bytes and apply the newest complete update. Returns True when one was applied.
+    # now is the monotonic receive time, by default the current time.
+    def feed(self, data, now=None):
+        buffer = self._buffer + data
+        latest = None
+        # Updates of this chunk older than latest, only their buttons are applied
+        older = []
+        updates = 0
+        pos = 0
+        while True:
+            # Binary frames follow each other directly, only look for text when there is none
+            sync = pos if buffer.startswith(SYNC, pos) else buffer.find(SYNC, pos)
+            if sync != pos:
+                text_end = len(buffer) if sync < 0 else sync
+                newline = buffer.rfind(b"\n", pos, text_end)
+                if newline >= 0:
+                    lines = [line for line in buffer[pos:newline].split(b"\n") if line.strip()]
+                    if lines:
+                        self.lines += len(lines)
+                        updates += len(lines)
+                        if latest is not None:
+                            older.append(latest)
+                        older.extend(lines[:-1])
+                        latest = lines[-1]
+                    pos = newline + 1
+                if sync < 0:
+                    break
+                if sync > pos:
+                    # Half a line right before a frame
+                    self.dropped += 1
+            frame, size = decode_frame(buffer, sync)
+            if size == 0:
+                pos = sync
+                break
+            if frame is None:
+                self.crc_errors += 1
+                pos = sync + 1
+                continue
+            self._count_frame(frame)
+            updates += 1
+            if latest is not None:
+                older.append(latest)
+            latest = frame
+            pos = sync + size
+        rest = buffer[pos:]
+        if len(rest) > MAX_LINE_LENGTH:
+            self.dropped += 1
+            rest = b""
+        self._buffer = rest
+        if latest is None:
+            return False
+        if now is None:
+            now = time.monotonic()
+        self.dropped += updates - 1
+        self._count_rate(updates, now)
+        if older:
+            self._fold_buttons(older, now)
+        if isinstance(latest, bytes):
+            self.registry.update_from_bytes(latest, now)
+            self._negotiate(now)
+        else:
+            self.registry.update_from_frame(latest, now)
+        self.parsed += 1
+        self.last_line = now
+        return True
+
+    # Apply the button changes of the skipped updates in the order they came in
+    def _fold_buttons(self, updates, now):
+        registry = self.registry
+        for update in updates:
+            if isinstance(update, bytes):
+                buttons = registry.buttons_from_bytes(update)
+                if buttons is not None:
+                    registry.update_buttons(*buttons, now)
+            else:
+                registry.update_buttons(update.j1[2], update.j2[2], now)
+
+    def _count_frame(self, frame):
+        self.frames += 1
+        if self.last_seq is not None:
+            gap = (frame.seq - self.last_seq - 1) & 0xFF
+            # A repeated number is a packet the radio delivered twice, not 255 lost ones
+            if gap != 0xFF:
+                self.seq_lost += gap
+        self.last_seq = frame.seq
+        self.last_time = frame.time
+        self.mode = PROTOCOL_BINARY
+        self._requests = 0
+
+    # Text is coming in: ask for binary frames again when the last request went unanswered,
+    # e.g. after the controller restarted
+    def _negotiate(self, now):
+        self.mode = PROTOCOL_TEXT
+        if self.protocol == PROTOCOL_TEXT:
+            return
+        if self._requested_at is not None and now - self._requested_at < NEGOTIATE_TIMEOUT:
+            return
+        if self.protocol == PROTOCOL_AUTO and self._requests >= NEGOTIATE_ATTEMPTS:
+            return
+        self.request_binary()
+
+    def _count_rate(self, lines, now):
+        self._rate_lines += lines
+        elapsed = now - self._rate_start
+        if elapsed >= 1.0:
+            self.lines_per_second = self._rate_lines / elapsed
+            self._rate_lines = 0
+            self._rate_start = now
+
+    # Update counters, the update rate over the last second and the age of the newest state
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "lines": self.lines,
+            "frames": self.frames,
+            "parsed": self.parsed,
+            "dropped": self.dropped,
+            "crc_errors": self.crc_errors,
+            "seq_lost": self.seq_lost,
+            "lines_per_second": self.lines_per_second,
+            "age_ms": (time.monotonic() - self.last_line) * 1000 if self.last_line else None,
+        }
@@ -1,38 +1,153 @@
+import time
+from collections import namedtuple
 from .joystick import Joystick
+from .sensor_registry import SensorRegistry
+from .sensor_registry import registry as sensor_registry
 
-# JoystickRegistry class for managing the joysticks
+# A change of one joystick: the new Joystick value, how far x and y moved and whether the
+# button went down (pressed) or up (released) with this change
+JoystickEvent = namedtuple("JoystickEvent", ["name", "joystick", "dx", "dy", "pressed", "released"])
+
+
+# JoystickRegistry class for managing the joysticks. Listeners registered with subscribe()
+# are called with a JoystickEvent for every update that changes a joystick, on the thread
+# that applied the update (the joystick reader), so they should only hand the event on.
 class JoystickRegistry:
-    def __init__(self):
+    def __init__(self, sensors: SensorRegistry = None):
         self.joysticks = {
             "J1": Joystick("J1"),
             "J2": Joystick("J2")
         }
+        # Replaced instead of changed, so publishing never sees a half updated list
+        self._listeners = ()
+        # Input filter per joystick name (see filters), applied before change detection
+        self.filters = {}
+        # ToF distances that come in on the same line
+        self.sensors = sensors if sensors is not None else SensorRegistry()
+        # Lines parsed, lines that did not match the controller format and binary frames applied
+        self.lines = 0
+        self.malformed = 0
+        self.frames = 0
+        # Updates that changed a joystick and listener calls that raised
+        self.changes = 0
+        self.listener_errors = 0
+
+    # Call listener(event) for every joystick change, returns the listener for unsubscribe()
+    def subscribe(self, listener):
+        self._listeners = self._listeners + (listener,)
+        return listener
+
+    def unsubscribe(self, listener):
+        self._listeners = tuple(l for l in self._listeners if l is not listener)
+
+    # Filter the axes of a joystick from now on, None switches filtering off
+    def set_filter(self, name, joystick_filter):
+        if joystick_filter is None:
+            self.filters.pop(name, None)
+        else:
+            self.filters[name] = joystick_filter
+
+    # Store the new (filtered) state of a joystick and publish it, unless nothing changed
+    def _apply(self, name, x, y, pressed, now):
+        joystick_filter = self.filters.get(name)
+        if joystick_filter is not None:
+            x, y = joystick_filter.apply(x, y, now)
+        old = self.joysticks[name]
+        if old.x == x and old.y == y and old.pressed == pressed:
+            return
+        self._publish(name, old, x, y, pressed, now)
+
+    def _publish(self, name, old, x, y, pressed, now):
+        joystick = old.updated(x, y, pressed, now)
+        self.joysticks[name] = joystick
+        self.changes += 1
+        listeners = self._listeners
+        if not listeners:
+            return
+        event = JoystickEvent(name, joystick, x - old.x, y - old.y,
+                              bool(pressed and not old.pressed), bool(old.pressed and not pressed))
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                self.listener_errors += 1
+                print(f"Joystick listener failed: {e}")
 
-    # Update joysticks from serial input
-    def update_from_serial(self, line: str):
-        # Parsing string format to extract joystick data to usable format (e.g., "J1:100,200,1,J2:150,250,0")
-        parts = line.strip().split(",")
-        i = 0
-        # Iterate through parts
-        while i < len(parts):
-            if parts[i].startswith("J"):
-                try:
-                    label, x = parts[i].split(":")
-                    y = int(parts[i + 1])
-                    pressed = int(parts[i + 2])
-                    x = int(x)
-                    if label in self.joysticks:
-                        self.joysticks[label].update(x, y, pressed)
-                    i += 3  # move past x, y, pressed
-                except Exception as e:
-                    print(f"Invalid joystick data at index {i}: {parts[i]} - {e}")
-                    i += 1
-            else:
-                i += 1  # skip non-joystick data
-
-    # Get a joystick by name
+    # Update joysticks from a line of serial input
+    def update_from_serial(self, line: str, now=None):
+        return self.update_from_bytes(line.encode("utf-8", "replace"), now)
+
+    # Update joysticks and ToF distances from one controller line as bytes, False when the
+    # line is malformed. The controller sends ToF "id,distance" pairs (or nothing) and then
+    # both joysticks: b"3,120,4,300,J1:100,200,1,J2:150,250,0\r\n", so the joysticks are
+    # always the last six fields. now is the monotonic receive time, by default the current time.
+    # Parsing bytes saves the decode, not time overall: split() still makes a bytes object
+    # per field and storing the ToF distances and joystick states costs more than the old
+    # str parser did, see benchmarks/joystick_parser.py.
+    def update_from_bytes(self, line: bytes, now=None):
+        self.lines += 1
+        parts = line.split(b",")
+        n = len(parts) - 6
+        if n < 0 or not parts[n].startswith(b"J1:") or not parts[n + 3].startswith(b"J2:"):
+            self.malformed += 1
+            return False
+        # Without sensors the line starts with a lone ","
+        start = 1 if n and not parts[0] else 0
+        if (n - start) % 2:
+            self.malformed += 1
+            return False
+        try:
+            # int() skips the line ending itself
+            x1, y1, sw1 = int(parts[n][3:]), int(parts[n + 1]), int(parts[n + 2])
+            x2, y2, sw2 = int(parts[n + 3][3:]), int(parts[n + 4]), int(parts[n + 5])
+            sensors = [(int(parts[i]), int(parts[i + 1])) for i in range(start, n, 2)]
+        except ValueError:
+            self.malformed += 1
+            return False
+        if now is None:
+            now = time.monotonic()
+        for sensor_id, distance in sensors:
+            self.sensors.update(sensor_id, distance, now)
+        self._apply("J1", x1, y1, sw1, now)
+        self._apply("J2", x2, y2, sw2, now)
+        return True
+
+    # Only the buttons of a controller line, (J1 pressed, J2 pressed), None when the line is malformed
+    def buttons_from_bytes(self, line: bytes):
+        parts = line.rsplit(b",", 5)
+        if len(parts) < 6 or not parts[3].startswith(b"J2:") or b"J1:" not in parts[0]:
+            return None
+        try:
+            return int(parts[2]), int(parts[5])
+        except ValueError:
+            return None
+
+    # Apply a button change of an update that is otherwise skipped, the axes keep their state
+    def update_buttons(self, pressed1, pressed2, now):
+        for name, pressed in (("J1", pressed1), ("J2", pressed2)):
+            old = self.joysticks[name]
+            if old.pressed != pressed:
+                self._publish(name, old, old.x, old.y, pressed, now)
+
+    # Update joysticks and ToF distances from a decoded binary controller frame
+    def update_from_frame(self, frame, now=None):
+        self.frames += 1
+        if now is None:
+            now = time.monotonic()
+        self._apply("J1", *frame.j1, now)
+        self._apply("J2", *frame.j2, now)
+        for sensor_id, distance in frame.sensors:
+            self.sensors.update(sensor_id, distance, now)
+        return True
+
+    # Get the current state of a joystick by name
     def get(self, name):
         return self.joysticks.get(name)
 
-# Singleton instance
-registry = JoystickRegistry()
+    # Parse and publish counters
+    def stats(self):
+        return {"lines": self.lines, "malformed": self.malformed, "frames": self.frames,
+                "changes": self.changes, "listener_errors": self.listener_errors}
+
+# Singleton instance, sharing the ToF sensor singleton
+registry = JoystickRegistry(sensor_registry)
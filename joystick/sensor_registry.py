@@ -0,0 +1,60 @@
+import time
+
+# Distances at or above this are what the VL53L0X reports when nothing is in range
+OUT_OF_RANGE = 8190
+# Seconds a distance stays valid, the motor side ESP sends new ones every 100 ms
+MAX_AGE = 0.5
+
+
+# SensorRegistry class for the ToF distance sensors: the newest distance (mm) per sensor id
+# and the monotonic time it was received. The controller forwards them on the joystick
+# line, the JoystickRegistry stores them here. Distance and time are kept as one
+# (distance, time) entry, so the control loop never sees one without the other while the
+# reader thread stores a new sensor.
+class SensorRegistry:
+    def __init__(self, max_age=MAX_AGE):
+        self.max_age = max_age
+        self.readings = {}
+        self.updates = 0
+
+    # Store a distance of a sensor received at monotonic time now (default: the current time)
+    def update(self, sensor_id, distance, now=None):
+        self.readings[sensor_id] = (distance, time.monotonic() if now is None else now)
+        self.updates += 1
+
+    # The distance of a sensor, None when it is unknown, too old or out of range
+    def get(self, sensor_id, now=None):
+        reading = self.readings.get(sensor_id)
+        if reading is None or reading[0] >= OUT_OF_RANGE:
+            return None
+        if now is None:
+            now = time.monotonic()
+        if now - reading[1] > self.max_age:
+            return None
+        return reading[0]
+
+    # The smallest valid distance of the given sensors (default all), None when there is none
+    def nearest(self, sensor_ids=None, now=None):
+        if now is None:
+            now = time.monotonic()
+        oldest = now - self.max_age
+        nearest = None
+        # The reader thread adds sensors while the control loop calls this, so work on a copy
+        for sensor_id, (distance, received) in tuple(self.readings.items()):
+            if sensor_ids is not None and sensor_id not in sensor_ids:
+                continue
+            if distance < OUT_OF_RANGE and received >= oldest and (nearest is None or distance < nearest):
+                nearest = distance
+        return nearest
+
+    # Newest distance and its age in ms per sensor
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "updates": self.updates,
+            "sensors": {sensor_id: {"distance": distance, "age_ms": (now - received) * 1000}
+                        for sensor_id, (distance, received) in tuple(self.readings.items())},
+        }
+
+# Singleton instance
+registry = SensorRegistry()
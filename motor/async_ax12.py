@@ -0,0 +1,171 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from motor.ax12 import Ax12
+
+
+# asyncio version of the Ax12 driver. It has the same command set as Ax12, every
+# command returns an awaitable:
+#
+#     ax = AsyncAx12()
+#     position = await ax.readPosition(3)
+#     load = await asyncio.wait_for(ax.readLoad(5), 0.005)   # per request timeout
+#
+# Packets are built by the shared Ax12 code. Putting one on the bus (direction pin,
+# write, drain and wire time) runs on a single transmit thread, replies are collected
+# by a reader registered on the event loop, so neither sending nor waiting for a servo
+# blocks the loop. Commands are served one at a time on the bus; a cancelled request
+# frees the bus for the next one. The port settings are left alone, the reader only
+# takes the bytes that already arrived.
+# Do not use a plain Ax12 on the same port while an AsyncAx12 is open.
+class AsyncAx12(Ax12):
+    def __init__(self):
+        super().__init__()
+        self.loop = asyncio.get_running_loop()
+        # one transaction on the bus at a time
+        self.lock = asyncio.Lock()
+        # (servo id, future) of the request waiting for its reply
+        self._waiter = None
+        self._transmitter = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ax12-tx")
+        self.loop.add_reader(Ax12.port.fileno(), self._on_readable)
+
+    # Detach from the event loop
+    def close(self):
+        self.loop.remove_reader(Ax12.port.fileno())
+        self._transmitter.shutdown()
+
+    # Called by the event loop when the port has data: parse it and hand the reply to its waiter
+    def _on_readable(self):
+        waiting = Ax12.port.in_waiting
+        if not waiting:
+            return
+        data = Ax12.port.read(waiting)
+        parser = Ax12.parser
+        parser.feed(data)
+        packet = parser.next()
+        while packet is not None:
+            waiter = self._waiter
+            if waiter is not None and not waiter[1].done() and self._is_reply(waiter[0], packet):
+                waiter[1].set_result(packet)
+                self._waiter = None
+            elif waiter is None:
+                Ax12.unmatchedReplies += 1
+            packet = parser.next()
+
+    def _result(self, value):
+        future = self.loop.create_future()
+        future.set_result(value)
+        return future
+
+    # The template buffer is reused by the next command, so the packet is copied before
+    # the coroutine that sends it gets a chance to run
+    def _request(self, id, packet, params):
+        return self._exchange(id, bytes(packet), params)
+
+    def _send(self, id, packet, params=0):
+        if params is None:
+            return self._broadcast(packet)
+        return self._exchange(id, bytes(packet), params, decode=True)
+
+    def _broadcast(self, packet):
+        return self._transmit_locked(bytes(packet))
+
+    # Put a packet on the bus from the transmit thread, returns the time the write started
+    def _transmit_async(self, packet):
+        return self.loop.run_in_executor(self._transmitter, self._transmit, packet)
+
+    async def _transmit_locked(self, packet):
+        async with self.lock:
+            await self._transmit_async(packet)
+
+    async def _exchange(self, id, packet, params, decode=False):
+        async with self.lock:
+            future = self.loop.create_future()
+            self._waiter = (id, future)
+            try:
+                start = await self._transmit_async(packet)
+                status = await asyncio.wait_for(future, self._reply_timeout(id, params))
+            except asyncio.TimeoutError:
+                Ax12.inputDirty = True
+                Ax12.shadow.invalidate(id)
+                raise Ax12.timeoutError("Timeout on servo " + str(id))
+            except asyncio.CancelledError:
+                # the reply may still arrive, drop it before the next command
+                Ax12.inputDirty = True
+                raise
+            finally:
+                self._waiter = None
+            self._record_latency(id, start)
+        return self._decode(status) if decode else status
+
+    # Commands that post-process the reply
+
+    async def read_register(self, id, address, width=None):
+        width = width or Ax12.REGISTERS[address].width
+        value = self._cached_register(id, address, width)
+        if value is not None:
+            return value
+        if width > 2:
+            data = await self.readBlock(id, address, width)
+            value = sum(b << (8 * i) for i, b in enumerate(data))
+            self._store_register(id, address, width, value)
+            return value
+        packet = self._template(Ax12.AX_READ_DATA, (address, width)).fill(id)
+        value = await self._send(id, packet, width)
+        self._store_register(id, address, width, value)
+        if address == Ax12.AX_RETURN_DELAY_TIME and value >= 0:
+            Ax12.returnDelay[id] = value * 2e-6
+        return value
+
+    async def readBlock(self, id, start, length):
+        packet = self._template(Ax12.AX_READ_DATA, (start, length)).fill(id)
+        return self._block_params(id, await self._request(id, packet, length), length)
+
+    async def readState(self, id):
+        return self._decode_state(await self.readBlock(id, Ax12.AX_PRESENT_POSITION_L, Ax12.AX_STATE_LENGTH))
+
+    async def readData(self, id):
+        async with self.lock:
+            future = self.loop.create_future()
+            self._waiter = (id, future)
+            try:
+                status = await asyncio.wait_for(future, self._reply_timeout(id, 2))
+            except asyncio.TimeoutError:
+                raise Ax12.timeoutError("Timeout on servo " + str(id))
+            finally:
+                self._waiter = None
+        return self._decode(status)
+
+    async def setReturnDelayTime(self, id, delay):
+        result = await self.write_register(id, Ax12.AX_RETURN_DELAY_TIME, int(delay) // 2)
+        Ax12.returnDelay[id] = (int(delay) // 2) * 2e-6
+        return result
+
+    async def syncWrite(self, start_register, data):
+        if data:
+            await super().syncWrite(start_register, data)
+
+    async def factoryReset(self, id, confirm=False):
+        result = super().factoryReset(id, confirm)
+        return await result if result is not None else None
+
+    async def pingServos(self, ids):
+        found = []
+        for i in ids:
+            Ax12.shadow.invalidate(i)
+            try:
+                await self.ping(i)
+                found.append(i)
+            except (Ax12.timeoutError, Ax12.axError):
+                pass
+        return found
+
+    async def learnServos(self, minValue=1, maxValue=6, verbose=False):
+        servoList = []
+        for i in range(minValue, maxValue + 1):
+            try:
+                await self.ping(i)
+                servoList.append(i)
+                if verbose: print(f"Found servo #{i}")
+            except Ax12.timeoutError as detail:
+                if verbose: print(f"Error pinging servo #{i}: {detail}")
+        return servoList
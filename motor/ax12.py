@@ -1,7 +1,161 @@
-from time import sleep
+from time import sleep, perf_counter
+from collections import namedtuple
 from serial import Serial
 import RPi.GPIO as GPIO
 
+# Description of one entry of the AX-12 control table
+Register = namedtuple("Register", ["name", "address", "width", "area", "writable"])
+
+# Prebuilt instruction packet with room for a number of variable parameter bytes.
+# Only the id, the variable bytes and the checksum are patched before sending.
+class PacketTemplate:
+    __slots__ = ("buf", "base", "offset")
+
+    def __init__(self, instruction, fixed=(), variable=0):
+        length = len(fixed) + variable + 2
+        self.buf = bytearray([0xFF, 0xFF, 0, length, instruction, *fixed] + [0] * (variable + 1))
+        # checksum contribution of the bytes that never change
+        self.base = length + instruction + sum(fixed)
+        self.offset = 5 + len(fixed)
+
+    # Patch id, variable parameters and checksum in place and return the packet
+    def fill(self, id, values=()):
+        buf = self.buf
+        buf[2] = id
+        total = self.base + id
+        i = self.offset
+        for v in values:
+            buf[i] = v
+            total += v
+            i += 1
+        buf[i] = ~total & 0xff
+        return buf
+
+# A status (or instruction) packet: servo id, error (or instruction) byte and parameters
+StatusPacket = namedtuple("StatusPacket", ["id", "error", "params"])
+
+# Incremental parser for AX-12 packets. Bytes are fed in as they arrive, the parser
+# hunts for the 0xFF 0xFF header, validates length and checksum and skips anything
+# that does not form a valid packet.
+class PacketParser:
+    # Largest length byte a valid packet can have (control table is 50 bytes)
+    MAX_LENGTH = 52
+
+    def __init__(self, packet_type=StatusPacket, max_length=MAX_LENGTH):
+        self.buffer = bytearray()
+        self.packet_type = packet_type
+        self.max_length = max_length
+        # number of bytes skipped while resynchronising and packets with a bad checksum
+        self.dropped = 0
+        self.checksumErrors = 0
+
+    def feed(self, data):
+        self.buffer += data
+
+    def clear(self):
+        self.dropped += len(self.buffer)
+        del self.buffer[:]
+
+    # Return the next complete packet in the buffer, or None if more bytes are needed
+    def next(self):
+        buf = self.buffer
+        while True:
+            start = buf.find(b"\xff\xff")
+            if start < 0:
+                # keep a trailing 0xFF, it can be the first half of a header
+                drop = len(buf) - 1 if buf.endswith(b"\xff") else len(buf)
+                self.dropped += drop
+                del buf[:drop]
+                return None
+            if start:
+                self.dropped += start
+                del buf[:start]
+            if len(buf) < 4:
+                return None
+            length = buf[3]
+            # 0xFF is never a valid id, so FF FF FF means the header starts one byte later
+            if buf[2] == 0xFF or length < 2 or length > self.max_length:
+                self.dropped += 1
+                del buf[:1]
+                continue
+            end = length + 3
+            if len(buf) <= end:
+                return None
+            if (~sum(buf[2:end])) & 0xff != buf[end]:
+                self.checksumErrors += 1
+                self.dropped += 2
+                del buf[:2]
+                continue
+            packet = self.packet_type(buf[2], buf[4], bytes(buf[5:end]))
+            del buf[:end + 1]
+            return packet
+
+# Host side copy of the servos' control tables. Remembers what was last written to
+# (or read from) each servo so unchanged writes and reads of static registers can
+# skip the bus.
+class RegisterShadow:
+    def __init__(self, size):
+        self.size = size
+        # servo id -> (values, valid flags)
+        self.tables = {}
+        self.hits = {"write": 0, "read": 0}
+        self.misses = {"write": 0, "read": 0}
+
+    def _table(self, id):
+        table = self.tables.get(id)
+        if table is None:
+            table = self.tables[id] = (bytearray(self.size), bytearray(self.size))
+        return table
+
+    # Known bytes at address, or None if any of them is unknown
+    def get(self, id, address, length):
+        table = self.tables.get(id)
+        end = address + length
+        if table is None or end > self.size or not all(table[1][address:end]):
+            return None
+        return bytes(table[0][address:end])
+
+    def store(self, id, address, data):
+        end = address + len(data)
+        if end > self.size:
+            return
+        values, valid = self._table(id)
+        values[address:end] = bytes(data)
+        valid[address:end] = b"\x01" * len(data)
+
+    # True (counted as a hit) when writing data would not change the servo
+    def unchanged(self, id, address, data):
+        hit = self.get(id, address, len(data)) == bytes(data)
+        if hit:
+            self.hits["write"] += 1
+        else:
+            self.misses["write"] += 1
+        return hit
+
+    # Cached bytes for a read (counted as hit or miss)
+    def lookup(self, id, address, length):
+        data = self.get(id, address, length)
+        if data is None:
+            self.misses["read"] += 1
+        else:
+            self.hits["read"] += 1
+        return data
+
+    # Forget registers of one servo, or of every servo when id is None
+    def forget(self, id, address, length):
+        for servo_id, (_, valid) in self.tables.items():
+            if id is None or servo_id == id:
+                valid[address:address + length] = bytes(length)
+
+    def invalidate(self, id=None):
+        if id is None:
+            self.tables.clear()
+        else:
+            self.tables.pop(id, None)
+
+    def stats(self):
+        return {"hits": dict(self.hits), "misses": dict(self.misses)}
+
 class Ax12:
     # important AX-12 constants
     # /////////////////////////////////////////////////////////// EEPROM AREA
@@ -102,6 +256,7 @@ class Ax12:
     AX_PUNCH_LENGTH = 5
     AX_SPEED_LENGTH = 5
     AX_GOAL_SP_LENGTH = 7
+    AX_STATE_LENGTH = AX_MOVING - AX_PRESENT_POSITION_L + 1
 
     # /////////////////////////////////////////////////////////////// Specials
     AX_BYTE_READ = 1
@@ -117,6 +272,66 @@ class Ax12:
     RX_TIME_OUT = 10
     TX_DELAY_TIME = 0.005
 
+    # /////////////////////////////////////////////////////////////// Timing
+    # Use the old fixed TX_DELAY_TIME sleep and 0.5 s reply timeout instead of drain based timing
+    FIXED_TX_DELAY = False
+    LEGACY_REPLY_TIMEOUT = 0.5
+    # Factory return delay time (register value 250 * 2 us)
+    DEFAULT_RETURN_DELAY = 0.0005
+    # Slack on top of the computed reply time for OS scheduling and UART latency
+    REPLY_TIMEOUT_MARGIN = 0.003
+    # Reply timeout is never shorter than this multiple of the measured servo latency
+    LATENCY_TIMEOUT_FACTOR = 3
+    # Smoothing factor of the per servo latency estimate
+    LATENCY_ALPHA = 0.2
+
+    # /////////////////////////////////////////////////////////////// Control table
+    EEPROM = "eeprom"
+    RAM = "ram"
+    REGISTER_TABLE = (
+        Register("model_number", AX_MODEL_NUMBER_L, 2, EEPROM, False),
+        Register("version", AX_VERSION, 1, EEPROM, False),
+        Register("id", AX_ID, 1, EEPROM, True),
+        Register("baud_rate", AX_BAUD_RATE, 1, EEPROM, True),
+        Register("return_delay_time", AX_RETURN_DELAY_TIME, 1, EEPROM, True),
+        Register("cw_angle_limit", AX_CW_ANGLE_LIMIT_L, 2, EEPROM, True),
+        Register("ccw_angle_limit", AX_CCW_ANGLE_LIMIT_L, 2, EEPROM, True),
+        Register("limit_temperature", AX_LIMIT_TEMPERATURE, 1, EEPROM, True),
+        Register("down_limit_voltage", AX_DOWN_LIMIT_VOLTAGE, 1, EEPROM, True),
+        Register("up_limit_voltage", AX_UP_LIMIT_VOLTAGE, 1, EEPROM, True),
+        Register("max_torque", AX_MAX_TORQUE_L, 2, EEPROM, True),
+        Register("return_level", AX_RETURN_LEVEL, 1, EEPROM, True),
+        Register("alarm_led", AX_ALARM_LED, 1, EEPROM, True),
+        Register("alarm_shutdown", AX_ALARM_SHUTDOWN, 1, EEPROM, True),
+        Register("torque_status", AX_TORQUE_STATUS, 1, RAM, True),
+        Register("led_status", AX_LED_STATUS, 1, RAM, True),
+        Register("cw_compliance_margin", AX_CW_COMPLIANCE_MARGIN, 1, RAM, True),
+        Register("ccw_compliance_margin", AX_CCW_COMPLIANCE_MARGIN, 1, RAM, True),
+        Register("cw_compliance_slope", AX_CW_COMPLIANCE_SLOPE, 1, RAM, True),
+        Register("ccw_compliance_slope", AX_CCW_COMPLIANCE_SLOPE, 1, RAM, True),
+        Register("goal_position", AX_GOAL_POSITION_L, 2, RAM, True),
+        Register("goal_speed", AX_GOAL_SPEED_L, 2, RAM, True),
+        Register("torque_limit", AX_TORQUE_LIMIT_L, 2, RAM, True),
+        Register("present_position", AX_PRESENT_POSITION_L, 2, RAM, False),
+        Register("present_speed", AX_PRESENT_SPEED_L, 2, RAM, False),
+        Register("present_load", AX_PRESENT_LOAD_L, 2, RAM, False),
+        Register("present_voltage", AX_PRESENT_VOLTAGE, 1, RAM, False),
+        Register("present_temperature", AX_PRESENT_TEMPERATURE, 1, RAM, False),
+        Register("registered_instruction", AX_REGISTERED_INSTRUCTION, 1, RAM, True),
+        Register("moving", AX_MOVING, 1, RAM, False),
+        Register("lock", AX_LOCK, 1, RAM, True),
+        Register("punch", AX_PUNCH_L, 2, RAM, True),
+    )
+    REGISTERS = dict((r.address, r) for r in REGISTER_TABLE)
+    # Registers kept in the register shadow: the EEPROM area and the RAM registers only the
+    # host writes (torque, LED, compliance, goal position/speed, torque limit, lock, punch).
+    # The servo's own readings are never shadowed. RAM goes back to its defaults when a
+    # servo shuts down or resets, so a servo's shadow is dropped on an error status, a
+    # timeout, a reset and when it is pinged again.
+    STATIC_REGISTERS = (frozenset(range(AX_MODEL_NUMBER_L, AX_PRESENT_POSITION_L))
+                        | {AX_LOCK, AX_PUNCH_L, AX_PUNCH_H})
+    TABLE_SIZE = AX_PUNCH_H + 1
+
     # RPi constants
     RPI_DIRECTION_PIN = 18
     RPI_DIRECTION_TX = GPIO.HIGH
@@ -126,6 +341,24 @@ class Ax12:
     # static variables
     port = None
     gpioSet = False
+    # skip writes that would not change the servo's control table
+    SHADOW_WRITES = True
+    shadow = RegisterShadow(TABLE_SIZE)
+    currentDirection = None
+    parser = PacketParser()
+    # last packet put on the bus, used to recognise its echo
+    lastPacket = None
+    # set after a timeout, the next command discards whatever is left in the input buffer
+    inputDirty = False
+    # replies that did not belong to the request being served
+    echoes = 0
+    unmatchedReplies = 0
+    # per servo return delay time (s) and measured round trip latency (s)
+    returnDelay = {}
+    latency = {}
+    _templates = {}
+    # session recorder that gets a copy of every packet put on the bus (see recording/)
+    recorder = None
 
     def __init__(self):
         if Ax12.port is None:
@@ -155,537 +388,412 @@ class Ax12:
     # Servo timeout
     class timeoutError(Exception) : pass
 
+    # Present state of a servo as read from registers 36-46 (raw register values)
+    ServoState = namedtuple("ServoState", ["position", "speed", "load", "voltage",
+                                           "temperature", "registered", "moving"])
+
     def direction(self,d):
+        if d == Ax12.currentDirection:
+            return
         GPIO.output(Ax12.RPI_DIRECTION_PIN, d)
+        Ax12.currentDirection = d
         sleep(Ax12.RPI_DIRECTION_SWITCH_DELAY)
 
+    # Time one byte takes on the wire (start bit, 8 data bits, stop bit)
+    def _byte_time(self):
+        return 10.0 / Ax12.port.baudrate
+
+    # Time to wait for a status packet with params parameter bytes from a servo
+    def _reply_timeout(self, id, params):
+        if Ax12.FIXED_TX_DELAY:
+            return Ax12.LEGACY_REPLY_TIMEOUT
+        timeout = ((6 + params) * self._byte_time()
+                   + Ax12.returnDelay.get(id, Ax12.DEFAULT_RETURN_DELAY)
+                   + Ax12.REPLY_TIMEOUT_MARGIN)
+        estimate = Ax12.latency.get(id)
+        if estimate is not None:
+            timeout = max(timeout, estimate * Ax12.LATENCY_TIMEOUT_FACTOR)
+        # rounded so the port is only reconfigured when the timeout really changes
+        return round(timeout, 4)
+
+    def _set_timeout(self, timeout):
+        if Ax12.port.timeout != timeout:
+            Ax12.port.timeout = timeout
+
+    # Update the smoothed round trip latency of a servo after a reply came in
+    def _record_latency(self, id, start):
+        sample = perf_counter() - start
+        estimate = Ax12.latency.get(id)
+        Ax12.latency[id] = sample if estimate is None else estimate + Ax12.LATENCY_ALPHA * (sample - estimate)
+
+    # True if packet is the reply of servo id, counts echoes and replies of other servos
+    def _is_reply(self, id, packet):
+        if packet.id != id:
+            Ax12.unmatchedReplies += 1
+            return False
+        sent = Ax12.lastPacket
+        if (sent is not None and sent[2] == id and packet.error == sent[4]
+                and len(sent) == len(packet.params) + 6 and packet.params == sent[5:-1]):
+            Ax12.echoes += 1
+            return False
+        if packet.error:
+            # the servo may have shut itself down, what we know about it is stale
+            Ax12.shadow.invalidate(id)
+        return True
+
+    # Read the next status packet of servo id, skipping echoes and replies of other servos
+    def _read_status(self, id, params, timeout):
+        parser = Ax12.parser
+        deadline = perf_counter() + timeout
+        self._set_timeout(timeout)
+        while True:
+            packet = parser.next()
+            while packet is not None:
+                if self._is_reply(id, packet):
+                    return packet
+                packet = parser.next()
+            if perf_counter() >= deadline:
+                Ax12.inputDirty = True
+                Ax12.shadow.invalidate(id)
+                raise Ax12.timeoutError("Timeout on servo " + str(id))
+            # the port timeout is set once per exchange, a read can end at most one timeout past the deadline
+            parser.feed(Ax12.port.read(max(6 + params - len(parser.buffer), 1)))
+
+    # Turn a status packet into the value the command methods return:
+    # -error on a servo error, the error byte (0) for a plain status, else the register value
+    def _decode(self, packet):
+        error = packet.error
+        if(error != 0):
+            print ("Error from servo: " + Ax12.dictErrors.get(error, "Multiple") + ' (code  ' + hex(error) + ')')
+            return -error
+        params = packet.params
+        if len(params) == 0:
+            return error
+        if len(params) == 1:
+            return params[0]
+        return (params[1]<<8) + params[0]
+
     def readData(self,id):
         self.direction(Ax12.RPI_DIRECTION_RX)
-        reply = Ax12.port.read(5) # [0xff, 0xff, origin, length, error]
-        try:
-            assert reply[0] == 0xFF
-        except:
-            e = "Timeout on servo " + str(id)
-            raise Ax12.timeoutError(e)
-
-        try :
-            length = reply[3] - 2
-            error = reply[4]
-
-            if(error != 0):
-                print ("Error from servo: " + Ax12.dictErrors[error] + ' (code  ' + hex(error) + ')')
-                return -error
-            # just reading error bit
-            elif(length == 0):
-                return error
+        return self._decode(self._read_status(id, 0, Ax12.port.timeout))
+
+    # Look up (or build once) the packet template for an instruction with fixed parameters
+    def _template(self, instruction, fixed=(), variable=0):
+        key = (instruction, fixed, variable)
+        template = Ax12._templates.get(key)
+        if template is None:
+            template = PacketTemplate(instruction, fixed, variable)
+            Ax12._templates[key] = template
+        return template
+
+    # Put a packet on the bus and switch back to receiving as soon as the last
+    # byte has left the UART. Returns the time the write started.
+    def _transmit(self, packet):
+        self.direction(Ax12.RPI_DIRECTION_TX)
+        if Ax12.inputDirty:
+            Ax12.port.flushInput()
+            Ax12.parser.clear()
+            Ax12.inputDirty = False
+        Ax12.lastPacket = packet
+        if Ax12.recorder is not None:
+            Ax12.recorder.bus(packet)
+        start = perf_counter()
+        Ax12.port.write(packet)
+        if Ax12.FIXED_TX_DELAY:
+            sleep(Ax12.TX_DELAY_TIME)
+        else:
+            # tcdrain returns once the kernel buffer is empty, the wire time covers the UART FIFO
+            Ax12.port.flush()
+            wait = start + len(packet) * self._byte_time() - perf_counter()
+            if wait > 0:
+                sleep(wait)
+        self.direction(Ax12.RPI_DIRECTION_RX)
+        return start
+
+    # Record every packet put on the bus with recorder.bus(packet), None stops recording
+    def setRecorder(self, recorder):
+        Ax12.recorder = recorder
+
+    # Send a broadcast packet, servos do not reply to these
+    def _broadcast(self, packet):
+        self._transmit(packet)
+
+    # Send a prepared packet and read the status reply with params parameter bytes.
+    # Broadcast packets (params None) get no reply.
+    def _send(self, id, packet, params=0):
+        if params is None:
+            return self._broadcast(packet)
+        return self._decode(self._request(id, packet, params))
+
+    # Send a prepared packet and return the raw status packet of the reply
+    def _request(self, id, packet, params):
+        start = self._transmit(packet)
+        status = self._read_status(id, params, self._reply_timeout(id, params))
+        self._record_latency(id, start)
+        return status
+
+    # Result of a command that did not need the bus (the async driver wraps it)
+    def _result(self, value):
+        return value
+
+    # Write raw bytes starting at address (WRITE_DATA or REG_WRITE).
+    # Writes that would not change the servo are skipped and report a clean status.
+    def _write(self, id, address, values, instruction=AX_WRITE_DATA):
+        shadow = Ax12.shadow
+        if self._shadowed(address, len(values)):
+            if instruction != Ax12.AX_WRITE_DATA:
+                # takes effect on ACTION, so the value is unknown until then
+                shadow.forget(id, address, len(values))
+            elif id == Ax12.AX_BROADCAST_ID:
+                shadow.forget(None, address, len(values))
+            elif Ax12.SHADOW_WRITES and shadow.unchanged(id, address, values):
+                return self._result(0)
             else:
-                if(length > 1):
-                    reply = Ax12.port.read(2)
-                    returnValue = (reply[1]<<8) + (reply[0]<<0)
-                else:
-                    reply = Ax12.port.read(1)
-                    returnValue = reply[0]
-                return returnValue
-        except Exception as detail:
-            raise Ax12.axError(detail)
+                shadow.store(id, address, values)
+        packet = self._template(instruction, (address,), len(values)).fill(id, values)
+        return self._send(id, packet, None if id == Ax12.AX_BROADCAST_ID else 0)
+
+    # True when all registers from address on are kept in the shadow
+    def _shadowed(self, address, length):
+        return all(a in Ax12.STATIC_REGISTERS for a in range(address, address + length))
+
+    # Value of a static register from the shadow, or None when it has to be read
+    def _cached_register(self, id, address, width):
+        if not self._shadowed(address, width):
+            return None
+        data = Ax12.shadow.lookup(id, address, width)
+        return None if data is None else sum(b << (8 * i) for i, b in enumerate(data))
+
+    # Remember a register value read from a servo
+    def _store_register(self, id, address, width, value):
+        if value >= 0 and self._shadowed(address, width):
+            Ax12.shadow.store(id, address, [(value >> (8 * i)) & 0xff for i in range(width)])
+
+    # Write a register from the register table, width defaults to the register width
+    def write_register(self, id, address, value, width=None):
+        width = width or Ax12.REGISTERS[address].width
+        if width == 1:
+            return self._write(id, address, (value & 0xff,))
+        return self._write(id, address, [(value >> (8 * i)) & 0xff for i in range(width)])
+
+    # Read a register from the register table, width defaults to the register width
+    def read_register(self, id, address, width=None):
+        width = width or Ax12.REGISTERS[address].width
+        value = self._cached_register(id, address, width)
+        if value is not None:
+            return value
+        if width > 2:
+            data = self.readBlock(id, address, width)
+            value = sum(b << (8 * i) for i, b in enumerate(data))
+            self._store_register(id, address, width, value)
+            return value
+        packet = self._template(Ax12.AX_READ_DATA, (address, width)).fill(id)
+        value = self._send(id, packet, width)
+        self._store_register(id, address, width, value)
+        if address == Ax12.AX_RETURN_DELAY_TIME and value >= 0:
+            Ax12.returnDelay[id] = value * 2e-6
+        return value
 
     def ping(self,id):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        checksum = (~(id + Ax12.AX_READ_DATA + Ax12.AX_PING))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_READ_DATA,
-                         Ax12.AX_PING,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self._send(id, self._template(Ax12.AX_PING).fill(id))
 
     def factoryReset(self,id, confirm = False):
         if(confirm):
-            self.direction(Ax12.RPI_DIRECTION_TX)
-            Ax12.port.flushInput()
-            checksum = (~(id + Ax12.AX_RESET_LENGTH + Ax12.AX_RESET))&0xff
-            outData = bytes([Ax12.AX_START,
-                             Ax12.AX_START,
-                             id,
-                             Ax12.AX_RESET_LENGTH,
-                             Ax12.AX_RESET,
-                             checksum])
-            Ax12.port.write(outData)
-            sleep(Ax12.TX_DELAY_TIME)
-            return self.readData(id)
+            Ax12.shadow.invalidate(id)
+            return self._send(id, self._template(Ax12.AX_RESET).fill(id))
         else:
             print ("nothing done, please send confirm = True as this fuction reset to the factory default value, i.e reset the motor ID")
             return
 
     def setID(self, id, newId):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        checksum = (~(id + Ax12.AX_ID_LENGTH + Ax12.AX_WRITE_DATA + Ax12.AX_ID + newId))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_ID_LENGTH,
-                         Ax12.AX_WRITE_DATA,
-                         Ax12.AX_ID,
-                         newId,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        Ax12.shadow.invalidate(newId)
+        packet = self._template(Ax12.AX_WRITE_DATA, (Ax12.AX_ID,), 1).fill(id, (newId & 0xff,))
+        # the status reply already comes from the new id
+        result = self._send(newId, packet)
+        Ax12.shadow.invalidate(id)
+        return result
 
     def setBaudRate(self, id, baudRate):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
         br = int((2000000/baudRate)-1)
-        checksum = (~(id + Ax12.AX_BD_LENGTH + Ax12.AX_WRITE_DATA + Ax12.AX_BAUD_RATE + br))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_BD_LENGTH,
-                         Ax12.AX_WRITE_DATA,
-                         Ax12.AX_BAUD_RATE,
-                         br,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self.write_register(id, Ax12.AX_BAUD_RATE, br)
 
     def setStatusReturnLevel(self, id, level):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        checksum = (~(id + Ax12.AX_SRL_LENGTH + Ax12.AX_WRITE_DATA + Ax12.AX_RETURN_LEVEL + level))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_SRL_LENGTH,
-                         Ax12.AX_WRITE_DATA,
-                         Ax12.AX_RETURN_LEVEL,
-                         level,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self.write_register(id, Ax12.AX_RETURN_LEVEL, level)
 
     def setReturnDelayTime(self, id, delay):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        checksum = (~(id + Ax12.AX_RDT_LENGTH + Ax12.AX_WRITE_DATA + Ax12.AX_RETURN_DELAY_TIME + (int(delay) // 2)) & 0xff) & 0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_RDT_LENGTH,
-                         Ax12.AX_WRITE_DATA,
-                         Ax12.AX_RETURN_DELAY_TIME,
-                         (int(delay) // 2) & 0xff,  # Correctie hier
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
-
+        result = self.write_register(id, Ax12.AX_RETURN_DELAY_TIME, int(delay) // 2)
+        Ax12.returnDelay[id] = (int(delay) // 2) * 2e-6
+        return result
 
     def lockRegister(self, id):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        checksum = (~(id + Ax12.AX_LR_LENGTH + Ax12.AX_WRITE_DATA + Ax12.AX_LOCK + Ax12.AX_LOCK_VALUE))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_LR_LENGTH,
-                         Ax12.AX_WRITE_DATA,
-                         Ax12.AX_LOCK,
-                         Ax12.AX_LOCK_VALUE,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self.write_register(id, Ax12.AX_LOCK, Ax12.AX_LOCK_VALUE)
 
     def move(self, id, position):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        p = [position&0xff, position>>8]
-        checksum = (~(id + Ax12.AX_GOAL_LENGTH + Ax12.AX_WRITE_DATA + Ax12.AX_GOAL_POSITION_L + p[0] + p[1]))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_GOAL_LENGTH,
-                         Ax12.AX_WRITE_DATA,
-                         Ax12.AX_GOAL_POSITION_L,
-                         p[0],
-                         p[1],
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self.write_register(id, Ax12.AX_GOAL_POSITION_L, position)
 
     def moveSpeed(self, id, position, speed):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        p = [position&0xff, position>>8]
-        s = [speed&0xff, speed>>8]
-        checksum = (~(id + Ax12.AX_GOAL_SP_LENGTH + Ax12.AX_WRITE_DATA + Ax12.AX_GOAL_POSITION_L + p[0] + p[1] + s[0] + s[1]))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_GOAL_SP_LENGTH,
-                         Ax12.AX_WRITE_DATA,
-                         Ax12.AX_GOAL_POSITION_L,
-                         p[0],
-                         p[1],
-                         s[0],
-                         s[1],
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self._write(id, Ax12.AX_GOAL_POSITION_L,
+                           (position&0xff, position>>8, speed&0xff, speed>>8))
+
+    # Stop a servo in wheel mode by setting its goal speed to 0
+    def stop(self, id):
+        return self._write(id, Ax12.AX_GOAL_SPEED_L, (0, 0))
 
     def moveRW(self, id, position):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        p = [position&0xff, position>>8]
-        checksum = (~(id + Ax12.AX_GOAL_LENGTH + Ax12.AX_REG_WRITE + Ax12.AX_GOAL_POSITION_L + p[0] + p[1]))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_GOAL_LENGTH,
-                         Ax12.AX_REG_WRITE,
-                         Ax12.AX_GOAL_POSITION_L,
-                         p[0],p[1],
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self._write(id, Ax12.AX_GOAL_POSITION_L,
+                           (position&0xff, position>>8), Ax12.AX_REG_WRITE)
 
     def moveSpeedRW(self, id, position, speed):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        p = [position&0xff, position>>8]
-        s = [speed&0xff, speed>>8]
-        checksum = (~(id + Ax12.AX_GOAL_SP_LENGTH + Ax12.AX_REG_WRITE + Ax12.AX_GOAL_POSITION_L + p[0] + p[1] + s[0] + s[1]))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_GOAL_SP_LENGTH,
-                         Ax12.AX_REG_WRITE,
-                         Ax12.AX_GOAL_POSITION_L,
-                         p[0],
-                         p[1],
-                         s[0],
-                         s[1],
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self._write(id, Ax12.AX_GOAL_POSITION_L,
+                           (position&0xff, position>>8, speed&0xff, speed>>8), Ax12.AX_REG_WRITE)
+
+    # Stage a goal speed (wheel mode) that takes effect on the next ACTION
+    def speedRW(self, id, speed):
+        return self._write(id, Ax12.AX_GOAL_SPEED_L, (speed&0xff, speed>>8), Ax12.AX_REG_WRITE)
 
     def action(self):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         Ax12.AX_BROADCAST_ID,
-                         Ax12.AX_ACTION_LENGTH,
-                         Ax12.AX_ACTION,
-                         Ax12.AX_ACTION_CHECKSUM])
-        Ax12.port.write(outData)
-        #sleep(Ax12.TX_DELAY_TIME)
+        return self._broadcast(self._template(Ax12.AX_ACTION).fill(Ax12.AX_BROADCAST_ID))
+
+    # Write the same register block to several servos with one broadcast packet.
+    # data maps servo id -> list of byte values starting at start_register,
+    # every entry must have the same length. Broadcast packets get no status reply.
+    def syncWrite(self, start_register, data):
+        if not data:
+            return
+        values = list(data.values())
+        dataLength = len(values[0])
+        if any(len(v) != dataLength for v in values):
+            raise ValueError("syncWrite needs the same number of bytes for every servo")
+        params = []
+        shadow = Ax12.shadow if self._shadowed(start_register, dataLength) else None
+        for id, v in data.items():
+            v = [b & 0xff for b in v]
+            if shadow is not None:
+                if Ax12.SHADOW_WRITES and shadow.unchanged(id, start_register, v):
+                    continue
+                shadow.store(id, start_register, v)
+            params.append(id)
+            params.extend(v)
+        if not params:
+            return self._result(None)
+        packet = self._template(Ax12.AX_SYNC_WRITE, (start_register, dataLength), len(params))
+        return self._broadcast(packet.fill(Ax12.AX_BROADCAST_ID, params))
+
+    # Set the goal speed of several servos in one sync write packet ({id: speed})
+    def syncMoveSpeed(self, speeds):
+        return self.syncWrite(Ax12.AX_GOAL_SPEED_L,
+                       {id: (speed&0xff, speed>>8) for id, speed in speeds.items()})
+
+    # Stop every servo at once: a sync write of goal speed 0 to ids followed by a
+    # broadcast torque off, sent back to back in a single write.
+    def emergencyStop(self, ids=()):
+        params = []
+        for id in ids:
+            params.extend((id, 0, 0))
+        packet = b""
+        if params:
+            template = self._template(Ax12.AX_SYNC_WRITE, (Ax12.AX_GOAL_SPEED_L, 2), len(params))
+            packet = bytes(template.fill(Ax12.AX_BROADCAST_ID, params))
+        template = self._template(Ax12.AX_WRITE_DATA, (Ax12.AX_TORQUE_STATUS,), 1)
+        packet += template.fill(Ax12.AX_BROADCAST_ID, (0,))
+        for id in ids:
+            Ax12.shadow.store(id, Ax12.AX_GOAL_SPEED_L, (0, 0))
+        Ax12.shadow.forget(None, Ax12.AX_TORQUE_STATUS, 1)
+        return self._broadcast(packet)
 
     def setTorqueStatus(self, id, status):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
         ts = 1 if ((status is True) or (status == 1)) else 0
-        checksum = (~(id + Ax12.AX_TORQUE_LENGTH + Ax12.AX_WRITE_DATA + Ax12.AX_TORQUE_STATUS + ts))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_TORQUE_LENGTH,
-                         Ax12.AX_WRITE_DATA,
-                         Ax12.AX_TORQUE_STATUS,
-                         ts,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self.write_register(id, Ax12.AX_TORQUE_STATUS, ts)
 
     def setLedStatus(self, id, status):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
         ls = 1 if ((status is True) or (status == 1)) else 0
-        checksum = (~(id + Ax12.AX_LED_LENGTH + Ax12.AX_WRITE_DATA + Ax12.AX_LED_STATUS + ls))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_LED_LENGTH,
-                         Ax12.AX_WRITE_DATA,
-                         Ax12.AX_LED_STATUS,
-                         ls,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self.write_register(id, Ax12.AX_LED_STATUS, ls)
 
     def setTemperatureLimit(self, id, temp):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        checksum = (~(id + Ax12.AX_TL_LENGTH + Ax12.AX_WRITE_DATA + Ax12.AX_LIMIT_TEMPERATURE + temp))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_TL_LENGTH,
-                         Ax12.AX_WRITE_DATA,
-                         Ax12.AX_LIMIT_TEMPERATURE,
-                         temp,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self.write_register(id, Ax12.AX_LIMIT_TEMPERATURE, temp)
 
     def setVoltageLimit(self, id, lowVolt, highVolt):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        checksum = (~(id + Ax12.AX_VL_LENGTH + Ax12.AX_WRITE_DATA + Ax12.AX_DOWN_LIMIT_VOLTAGE + lowVolt + highVolt))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_VL_LENGTH,
-                         Ax12.AX_WRITE_DATA,
-                         Ax12.AX_DOWN_LIMIT_VOLTAGE,
-                         lowVolt,
-                         highVolt,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self._write(id, Ax12.AX_DOWN_LIMIT_VOLTAGE, (lowVolt, highVolt))
 
     def setAngleLimit(self, id, cwLimit, ccwLimit):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        cw = [cwLimit&0xff, cwLimit>>8]
-        ccw = [ccwLimit&0xff, ccwLimit>>8]
-        checksum = (~(id + Ax12.AX_AL_LENGTH + Ax12.AX_WRITE_DATA + Ax12.AX_CW_ANGLE_LIMIT_L + cw[0] + cw[1] + ccw[0] + ccw[1]))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_AL_LENGTH,
-                         Ax12.AX_WRITE_DATA,
-                         Ax12.AX_CW_ANGLE_LIMIT_L,
-                         cw[0],
-                         cw[1],
-                         ccw[0],
-                         ccw[1],
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self._write(id, Ax12.AX_CW_ANGLE_LIMIT_L,
+                           (cwLimit&0xff, cwLimit>>8, ccwLimit&0xff, ccwLimit>>8))
 
     def setTorqueLimit(self, id, torque):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        mt = [torque&0xff, torque>>8]
-        checksum = (~(id + Ax12.AX_MT_LENGTH + Ax12.AX_WRITE_DATA + Ax12.AX_MAX_TORQUE_L + mt[0] + mt[1]))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_MT_LENGTH,
-                         Ax12.AX_WRITE_DATA,
-                         Ax12.AX_MAX_TORQUE_L,
-                         mt[0],
-                         mt[1],
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self.write_register(id, Ax12.AX_MAX_TORQUE_L, torque)
 
     def setPunchLimit(self, id, punch):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        p = [punch&0xff, punch>>8]
-        checksum = (~(id + Ax12.AX_PUNCH_LENGTH + Ax12.AX_WRITE_DATA + Ax12.AX_PUNCH_L + p[0] + p[1]))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_PUNCH_LENGTH,
-                         Ax12.AX_WRITE_DATA,
-                         Ax12.AX_PUNCH_L,
-                         p[0],
-                         p[1],
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self.write_register(id, Ax12.AX_PUNCH_L, punch)
 
     def setCompliance(self, id, cwMargin, ccwMargin, cwSlope, ccwSlope):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        checksum = (~(id + Ax12.AX_COMPLIANCE_LENGTH + Ax12.AX_WRITE_DATA + Ax12.AX_CW_COMPLIANCE_MARGIN + cwMargin + ccwMargin + cwSlope + ccwSlope))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_COMPLIANCE_LENGTH,
-                         Ax12.AX_WRITE_DATA,
-                         Ax12.AX_CW_COMPLIANCE_MARGIN,
-                         cwMargin,
-                         ccwMargin,
-                         cwSlope,
-                         ccwSlope,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self._write(id, Ax12.AX_CW_COMPLIANCE_MARGIN, (cwMargin, ccwMargin, cwSlope, ccwSlope))
 
     def setLedAlarm(self, id, alarm):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        checksum = (~(id + Ax12.AX_LEDALARM_LENGTH + Ax12.AX_WRITE_DATA + Ax12.AX_ALARM_LED + alarm))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_LEDALARM_LENGTH,
-                         Ax12.AX_WRITE_DATA,
-                         Ax12.AX_ALARM_LED,
-                         alarm,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self.write_register(id, Ax12.AX_ALARM_LED, alarm)
 
     def setShutdownAlarm(self, id, alarm):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        checksum = (~(id + Ax12.AX_SHUTDOWNALARM_LENGTH + Ax12.AX_WRITE_DATA + Ax12.AX_ALARM_SHUTDOWN + alarm))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_SHUTDOWNALARM_LENGTH,
-                         Ax12.AX_WRITE_DATA,
-                         Ax12.AX_ALARM_SHUTDOWN,
-                         alarm,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self.write_register(id, Ax12.AX_ALARM_SHUTDOWN, alarm)
 
     def readTemperature(self, id):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        checksum = (~(id + Ax12.AX_TEM_LENGTH + Ax12.AX_READ_DATA + Ax12.AX_PRESENT_TEMPERATURE + Ax12.AX_BYTE_READ))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_TEM_LENGTH,
-                         Ax12.AX_READ_DATA,
-                         Ax12.AX_PRESENT_TEMPERATURE,
-                         Ax12.AX_BYTE_READ,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self.read_register(id, Ax12.AX_PRESENT_TEMPERATURE)
 
     def readPosition(self, id):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        checksum = (~(id + Ax12.AX_POS_LENGTH + Ax12.AX_READ_DATA + Ax12.AX_PRESENT_POSITION_L + Ax12.AX_INT_READ))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_POS_LENGTH,
-                         Ax12.AX_READ_DATA,
-                         Ax12.AX_PRESENT_POSITION_L,
-                         Ax12.AX_INT_READ,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self.read_register(id, Ax12.AX_PRESENT_POSITION_L)
 
     def readVoltage(self, id):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        checksum = (~(id + Ax12.AX_VOLT_LENGTH + Ax12.AX_READ_DATA + Ax12.AX_PRESENT_VOLTAGE + Ax12.AX_BYTE_READ))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_VOLT_LENGTH,
-                         Ax12.AX_READ_DATA,
-                         Ax12.AX_PRESENT_VOLTAGE,
-                         Ax12.AX_BYTE_READ,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self.read_register(id, Ax12.AX_PRESENT_VOLTAGE)
 
     def readSpeed(self, id):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        instruction = Ax12.AX_READ_DATA
-        start_address = Ax12.AX_PRESENT_SPEED_L
-        bytes_to_read = Ax12.AX_INT_READ  # 2
-        length = 4  # 2 + 2 parameters
-
-        checksum_data = bytes([id, length, instruction, start_address, bytes_to_read])
-        checksum = (~sum(checksum_data)) & 0xFF
-
-        outData = bytes([Ax12.AX_START,
-                          Ax12.AX_START,
-                          id,
-                          length,
-                          instruction,
-                          start_address,
-                          bytes_to_read,
-                          checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)  # Call readData with only id
+        return self.read_register(id, Ax12.AX_PRESENT_SPEED_L)
 
     def readLoad(self, id):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        checksum = (~(id + Ax12.AX_LOAD_LENGTH + Ax12.AX_READ_DATA + Ax12.AX_PRESENT_LOAD_L + Ax12.AX_INT_READ))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_LOAD_LENGTH,
-                         Ax12.AX_READ_DATA,
-                         Ax12.AX_PRESENT_LOAD_L,
-                         Ax12.AX_INT_READ,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self.read_register(id, Ax12.AX_PRESENT_LOAD_L)
 
     def readMovingStatus(self, id):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        checksum = (~(id + Ax12.AX_MOVING_LENGTH + Ax12.AX_READ_DATA + Ax12.AX_MOVING + Ax12.AX_BYTE_READ))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_MOVING_LENGTH,
-                         Ax12.AX_READ_DATA,
-                         Ax12.AX_MOVING,
-                         Ax12.AX_BYTE_READ,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
+        return self.read_register(id, Ax12.AX_MOVING)
 
     def readRWStatus(self, id):
-        self.direction(Ax12.RPI_DIRECTION_TX)
-        Ax12.port.flushInput()
-        checksum = (~(id + Ax12.AX_RWS_LENGTH + Ax12.AX_READ_DATA + Ax12.AX_REGISTERED_INSTRUCTION + Ax12.AX_BYTE_READ))&0xff
-        outData = bytes([Ax12.AX_START,
-                         Ax12.AX_START,
-                         id,
-                         Ax12.AX_RWS_LENGTH,
-                         Ax12.AX_READ_DATA,
-                         Ax12.AX_REGISTERED_INSTRUCTION,
-                         Ax12.AX_BYTE_READ,
-                         checksum])
-        Ax12.port.write(outData)
-        sleep(Ax12.TX_DELAY_TIME)
-        return self.readData(id)
-
+        return self.read_register(id, Ax12.AX_REGISTERED_INSTRUCTION)
+
+    # Read length consecutive registers starting at start with one READ_DATA
+    def readBlock(self, id, start, length):
+        packet = self._template(Ax12.AX_READ_DATA, (start, length)).fill(id)
+        return self._block_params(id, self._request(id, packet, length), length)
+
+    # Check the status packet of a block read and return its parameter bytes
+    def _block_params(self, id, status, length):
+        if status.error != 0:
+            print ("Error from servo: " + Ax12.dictErrors.get(status.error, "Multiple") + ' (code  ' + hex(status.error) + ')')
+        if len(status.params) != length:
+            raise Ax12.axError("Expected " + str(length) + " bytes from servo " + str(id) + ", got " + str(len(status.params)))
+        return status.params
+
+    # Read position, speed, load, voltage, temperature and moving status in one transaction
+    def readState(self, id):
+        return self._decode_state(self.readBlock(id, Ax12.AX_PRESENT_POSITION_L, Ax12.AX_STATE_LENGTH))
+
+    # Build a ServoState from the 11 bytes of registers 36-46
+    def _decode_state(self, d):
+        return Ax12.ServoState(position=d[0] | (d[1] << 8),
+                               speed=d[2] | (d[3] << 8),
+                               load=d[4] | (d[5] << 8),
+                               voltage=d[6],
+                               temperature=d[7],
+                               registered=d[8],
+                               moving=d[10])
+
+    # Ping every id once with the short adaptive reply timeout, returns the ids that answered.
+    # The shadow of every id is dropped first: discovery starts from what the servos report.
+    def pingServos(self, ids):
+        found = []
+        for i in ids:
+            Ax12.shadow.invalidate(i)
+            try:
+                self.ping(i)
+                found.append(i)
+            except (Ax12.timeoutError, Ax12.axError):
+                pass
+        return found
 
     def learnServos(self, minValue=1, maxValue=6, verbose=False) :
         servoList = []
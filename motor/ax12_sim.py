@@ -0,0 +1,297 @@
+import os
+import pty
+import select
+import tempfile
+import threading
+import tty
+from collections import namedtuple
+from time import perf_counter, sleep
+from serial import Serial
+
+# The simulator replaces RPi.GPIO before ax12 is imported, so this works without GPIO pins
+from motor import gpio_stub
+gpio_stub.install()
+
+from motor.ax12 import Ax12, PacketParser
+
+# Servo cache for a MotorManager/MotorRegistry on the virtual bus, so a simulator run
+# never overwrites the robot's own cache (motor_registry.SERVO_CACHE_FILE)
+SIM_SERVO_CACHE_FILE = os.path.join(tempfile.gettempdir(), "botos_sim_servos.json")
+
+# An instruction packet as the servos see it
+InstructionPacket = namedtuple("InstructionPacket", ["id", "instruction", "params"])
+
+# Error bits of a status packet
+ERROR_ANGLE_LIMIT = 2
+ERROR_OVERHEATING = 4
+ERROR_RANGE = 8
+ERROR_CHECKSUM = 16
+ERROR_INSTRUCTION = 64
+
+# Factory defaults of the AX-12A control table (address: value)
+DEFAULTS = {
+    Ax12.AX_MODEL_NUMBER_L: 12,
+    Ax12.AX_VERSION: 24,
+    Ax12.AX_BAUD_RATE: 1,
+    Ax12.AX_RETURN_DELAY_TIME: 250,
+    Ax12.AX_CCW_ANGLE_LIMIT_L: 0xFF,
+    Ax12.AX_CCW_ANGLE_LIMIT_H: 0x03,
+    Ax12.AX_LIMIT_TEMPERATURE: 70,
+    Ax12.AX_DOWN_LIMIT_VOLTAGE: 60,
+    Ax12.AX_UP_LIMIT_VOLTAGE: 140,
+    Ax12.AX_MAX_TORQUE_L: 0xFF,
+    Ax12.AX_MAX_TORQUE_H: 0x03,
+    Ax12.AX_RETURN_LEVEL: Ax12.AX_RETURN_ALL,
+    Ax12.AX_ALARM_LED: 36,
+    Ax12.AX_ALARM_SHUTDOWN: 36,
+    Ax12.AX_CW_COMPLIANCE_MARGIN: 1,
+    Ax12.AX_CCW_COMPLIANCE_MARGIN: 1,
+    Ax12.AX_CW_COMPLIANCE_SLOPE: 32,
+    Ax12.AX_CCW_COMPLIANCE_SLOPE: 32,
+    Ax12.AX_GOAL_POSITION_H: 0x02,
+    Ax12.AX_TORQUE_LIMIT_L: 0xFF,
+    Ax12.AX_TORQUE_LIMIT_H: 0x03,
+    Ax12.AX_PRESENT_POSITION_L: 0x00,
+    Ax12.AX_PRESENT_POSITION_H: 0x02,
+    Ax12.AX_PRESENT_VOLTAGE: 120,
+    Ax12.AX_PRESENT_TEMPERATURE: 35,
+    Ax12.AX_PUNCH_L: 32,
+}
+TABLE_SIZE = Ax12.AX_PUNCH_H + 1
+# Registers a write can change (everything else answers with a range error)
+WRITABLE = set()
+for register in Ax12.REGISTER_TABLE:
+    if register.writable:
+        WRITABLE.update(range(register.address, register.address + register.width))
+# Registers that start or stop motion, changes are logged with a timestamp
+MOTION_REGISTERS = {Ax12.AX_TORQUE_STATUS, Ax12.AX_GOAL_POSITION_L, Ax12.AX_GOAL_POSITION_H,
+                    Ax12.AX_GOAL_SPEED_L, Ax12.AX_GOAL_SPEED_H}
+
+
+# One simulated servo: its control table and a simple model of the motor
+class VirtualServo:
+    def __init__(self, servo_id):
+        self.table = bytearray(TABLE_SIZE)
+        self.reset(servo_id)
+        # load reported in present load (0-1023, bit 10 is the direction)
+        self.load = 0
+        # goal position/speed staged by REG_WRITE until ACTION
+        self.registered = None
+        self._updated = perf_counter()
+
+    def reset(self, servo_id=1):
+        self.table[:] = bytes(TABLE_SIZE)
+        for address, value in DEFAULTS.items():
+            self.table[address] = value
+        self.table[Ax12.AX_ID] = servo_id
+
+    @property
+    def id(self):
+        return self.table[Ax12.AX_ID]
+
+    def word(self, address):
+        return self.table[address] | (self.table[address + 1] << 8)
+
+    def set_word(self, address, value):
+        self.table[address] = value & 0xff
+        self.table[address + 1] = (value >> 8) & 0xff
+
+    def wheel_mode(self):
+        return self.word(Ax12.AX_CW_ANGLE_LIMIT_L) == 0 and self.word(Ax12.AX_CCW_ANGLE_LIMIT_L) == 0
+
+    # Advance the present position/speed/load registers to now
+    def update(self, now):
+        dt = now - self._updated
+        self._updated = now
+        table = self.table
+        goal_speed = self.word(Ax12.AX_GOAL_SPEED_L)
+        position = self.word(Ax12.AX_PRESENT_POSITION_L)
+        # 1 speed unit is about 0.111 rpm, 1 position unit 0.29 degree
+        units_per_second = (goal_speed & 0x3FF) * 0.111 * 6 / 0.29
+        if not table[Ax12.AX_TORQUE_STATUS]:
+            moving = False
+        elif self.wheel_mode():
+            direction = -1 if goal_speed & 0x400 else 1
+            position = (position + direction * units_per_second * dt) % 1024
+            moving = goal_speed & 0x3FF != 0
+        else:
+            goal = self.word(Ax12.AX_GOAL_POSITION_L)
+            step = units_per_second * dt if goal_speed else abs(goal - position)
+            position = goal if abs(goal - position) <= step else position + step * (1 if goal > position else -1)
+            moving = position != goal
+        self.set_word(Ax12.AX_PRESENT_POSITION_L, int(position))
+        self.set_word(Ax12.AX_PRESENT_SPEED_L, goal_speed if moving else 0)
+        self.set_word(Ax12.AX_PRESENT_LOAD_L, self.load)
+        table[Ax12.AX_MOVING] = 1 if moving else 0
+
+    # Write data at address, returns the error bits for the status packet
+    def write(self, address, data):
+        if address + len(data) > TABLE_SIZE or any(a not in WRITABLE for a in range(address, address + len(data))):
+            return ERROR_RANGE
+        self.table[address:address + len(data)] = data
+        if (not self.wheel_mode() and address <= Ax12.AX_GOAL_POSITION_L < address + len(data)):
+            goal = self.word(Ax12.AX_GOAL_POSITION_L)
+            if not self.word(Ax12.AX_CW_ANGLE_LIMIT_L) <= goal <= self.word(Ax12.AX_CCW_ANGLE_LIMIT_L):
+                return ERROR_ANGLE_LIMIT
+        return 0
+
+    # Error bits the servo reports in every status packet
+    def alarms(self):
+        if self.table[Ax12.AX_PRESENT_TEMPERATURE] > self.table[Ax12.AX_LIMIT_TEMPERATURE]:
+            return ERROR_OVERHEATING
+        return 0
+
+
+# A virtual AX-12 bus on a pseudo-terminal. Ax12 opens the pty like the real UART,
+# a background thread answers for the simulated servos:
+#
+#     bus = VirtualAx12Bus([2, 3, 4, 5, 6, 7]).start()
+#     bus.connect()             # Ax12 (and everything built on it) now talks to the simulator
+#     registry = MotorRegistry()
+#
+# Replies honour the return delay time and status return level registers and, with
+# wire_time on, take as long as they would at the configured baud rate.
+class VirtualAx12Bus:
+    def __init__(self, ids, baudrate=1000000, wire_time=True, echo=False, record=False):
+        self.servos = {i: VirtualServo(i) for i in ids}
+        self.baudrate = baudrate
+        self.wire_time = wire_time
+        # send every received packet back like a half-duplex bus without direction switching
+        self.echo = echo
+        self.record = record
+        # (time, InstructionPacket) of every packet received, when record is on
+        self.received = []
+        # (time, servo id, address, value) of every change to a motion register
+        self.motion_log = []
+        self.stats = {"packets": 0, "replies": 0, "checksum_errors": 0}
+        self.parser = PacketParser(InstructionPacket, max_length=255)
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.device = os.ttyname(self.slave)
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="ax12-sim", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join()
+        os.close(self.master)
+        os.close(self.slave)
+
+    # Point Ax12 at the simulator, returns the Ax12 class
+    def connect(self):
+        if Ax12.port is not None:
+            Ax12.port.close()
+        Ax12.port = Serial(self.device, baudrate=self.baudrate, timeout=0.5)
+        Ax12.inputDirty = True
+        return Ax12
+
+    def _run(self):
+        parser = self.parser
+        while self.running:
+            ready, _, _ = select.select([self.master], [], [], 0.05)
+            if not ready:
+                continue
+            data = os.read(self.master, 4096)
+            now = perf_counter()
+            if self.echo:
+                os.write(self.master, data)
+            checksum_errors = parser.checksumErrors
+            parser.feed(data)
+            packet = parser.next()
+            while packet is not None:
+                self.stats["packets"] += 1
+                if self.record:
+                    self.received.append((now, packet))
+                self._handle(packet, now)
+                packet = parser.next()
+            if parser.checksumErrors != checksum_errors:
+                self.stats["checksum_errors"] += parser.checksumErrors - checksum_errors
+
+    def _handle(self, packet, now):
+        instruction = packet.instruction
+        params = packet.params
+        if instruction == Ax12.AX_SYNC_WRITE:
+            start, length = params[0], params[1]
+            for i in range(2, len(params) - length, length + 1):
+                servo = self.servos.get(params[i])
+                if servo is not None:
+                    self._write(servo, start, params[i + 1:i + 1 + length], now)
+            return
+        if instruction == Ax12.AX_ACTION:
+            for servo in self.servos.values():
+                self._action(servo, now)
+            return
+        if packet.id == Ax12.AX_BROADCAST_ID:
+            targets = list(self.servos.values())
+        else:
+            servo = self.servos.get(packet.id)
+            targets = [servo] if servo is not None else []
+        for servo in targets:
+            error, data, level = self._execute(servo, instruction, params, now)
+            if packet.id != Ax12.AX_BROADCAST_ID and servo.table[Ax12.AX_RETURN_LEVEL] >= level:
+                self._reply(servo, error | servo.alarms(), data)
+
+    # Run one instruction on a servo, returns (error bits, reply data, return level needed to reply)
+    def _execute(self, servo, instruction, params, now):
+        if instruction == Ax12.AX_PING:
+            return 0, b"", Ax12.AX_RETURN_NONE
+        if instruction == Ax12.AX_READ_DATA:
+            address, length = params[0], params[1]
+            if address + length > TABLE_SIZE:
+                return ERROR_RANGE, b"", Ax12.AX_RETURN_READ
+            servo.update(now)
+            return 0, bytes(servo.table[address:address + length]), Ax12.AX_RETURN_READ
+        if instruction == Ax12.AX_WRITE_DATA:
+            return self._write(servo, params[0], params[1:], now), b"", Ax12.AX_RETURN_ALL
+        if instruction == Ax12.AX_REG_WRITE:
+            servo.registered = (params[0], bytes(params[1:]))
+            servo.table[Ax12.AX_REGISTERED_INSTRUCTION] = 1
+            return 0, b"", Ax12.AX_RETURN_ALL
+        if instruction == Ax12.AX_RESET:
+            old_id = servo.id
+            servo.reset()
+            self._rekey(servo, old_id)
+            return 0, b"", Ax12.AX_RETURN_ALL
+        return ERROR_INSTRUCTION, b"", Ax12.AX_RETURN_NONE
+
+    def _write(self, servo, address, data, now):
+        servo.update(now)
+        before = bytes(servo.table)
+        error = servo.write(address, data)
+        for a in range(address, min(address + len(data), TABLE_SIZE)):
+            if a in MOTION_REGISTERS and servo.table[a] != before[a]:
+                self.motion_log.append((now, servo.id, a, servo.table[a]))
+        self._rekey(servo, before[Ax12.AX_ID])
+        return error
+
+    # Find a servo under its id again after the ID register changed (write or reset)
+    def _rekey(self, servo, old_id):
+        if servo.id != old_id and self.servos.get(old_id) is servo:
+            del self.servos[old_id]
+            self.servos[servo.id] = servo
+
+    def _action(self, servo, now):
+        if servo.registered is None:
+            return
+        address, data = servo.registered
+        servo.registered = None
+        servo.table[Ax12.AX_REGISTERED_INSTRUCTION] = 0
+        self._write(servo, address, data, now)
+
+    def _reply(self, servo, error, data):
+        reply = bytearray([0xFF, 0xFF, servo.id, len(data) + 2, error]) + data
+        reply.append(~sum(reply[2:]) & 0xff)
+        delay = servo.table[Ax12.AX_RETURN_DELAY_TIME] * 2e-6
+        if self.wire_time:
+            delay += len(reply) * 10.0 / self.baudrate
+        if delay > 0:
+            sleep(delay)
+        os.write(self.master, reply)
+        self.stats["replies"] += 1
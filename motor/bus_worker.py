@@ -0,0 +1,135 @@
+import functools
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+from time import perf_counter
+from motor.ax12 import Ax12
+
+# Request priorities, lower values are served first
+PRIORITY_STOP = 0
+PRIORITY_MOTION = 1
+PRIORITY_TELEMETRY = 2
+PRIORITY_NAMES = {PRIORITY_STOP: "stop", PRIORITY_MOTION: "motion", PRIORITY_TELEMETRY: "telemetry"}
+
+
+# BusWorker owns the AX-12 bus: one thread runs every command in priority order.
+# Callers submit commands and get a Future back, or call Ax12 methods on the
+# worker directly (worker.readLoad(3)) which submits them and waits for the result.
+class BusWorker:
+    # Ax12 methods that jump ahead of everything else
+    STOP_COMMANDS = {"stop", "emergencyStop"}
+    # Ax12 methods that only read from the servos
+    TELEMETRY_COMMANDS = {"ping", "pingServos", "readData", "readBlock", "readState", "read_register", "learnServos"}
+
+    # Raised for motion commands while the emergency stop is latched
+    class EmergencyStopped(Exception): pass
+
+    def __init__(self, ax: Ax12):
+        self.ax = ax
+        self.queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._pending = {p: 0 for p in PRIORITY_NAMES}
+        self._waits = {p: [0, 0.0, 0.0] for p in PRIORITY_NAMES}  # count, total, max
+        # Set by emergency_stop(), motion commands are refused until it is cleared
+        self.latched = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="ax12-bus", daemon=True)
+        self.thread.start()
+
+    # Priority of an Ax12 method by name
+    def priority_of(self, name):
+        if name in self.STOP_COMMANDS:
+            return PRIORITY_STOP
+        if name in self.TELEMETRY_COMMANDS or name.startswith("read"):
+            return PRIORITY_TELEMETRY
+        return PRIORITY_MOTION
+
+    # Queue fn(*args) to run on the bus thread, returns a Future with its result
+    def submit(self, priority, fn, *args):
+        future = Future()
+        if priority == PRIORITY_MOTION and self.latched.is_set():
+            future.set_exception(BusWorker.EmergencyStopped("Emergency stop is latched"))
+            return future
+        # Called from the bus thread itself (e.g. from a submitted function): run inline
+        if threading.current_thread() is self.thread:
+            self._execute(future, fn, args)
+            return future
+        with self._lock:
+            self._pending[priority] += 1
+        self.queue.put((priority, next(self._sequence), perf_counter(), future, fn, args))
+        return future
+
+    # Forward Ax12 method calls through the queue and wait for their result
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = getattr(self.ax, name)
+        if not callable(attr):
+            return attr
+        priority = self.priority_of(name)
+
+        def call(*args, **kwargs):
+            fn = functools.partial(attr, **kwargs) if kwargs else attr
+            return self.submit(priority, fn, *args).result()
+        return call
+
+    # True while requests with a higher priority than the given one are waiting
+    def busy(self, priority=PRIORITY_TELEMETRY):
+        with self._lock:
+            return any(self._pending[p] for p in PRIORITY_NAMES if p < priority)
+
+    # Stop all ids with one broadcast ahead of any queued work and refuse motion
+    # commands until clear_emergency_stop(). Returns the Future of the stop packet.
+    def emergency_stop(self, ids=()):
+        self.latched.set()
+        return self.submit(PRIORITY_STOP, self.ax.emergencyStop, tuple(ids))
+
+    def clear_emergency_stop(self):
+        self.latched.clear()
+
+    # Stop the bus thread after the queued work is done
+    def close(self):
+        self.queue.put((len(PRIORITY_NAMES), next(self._sequence), perf_counter(), None, None, ()))
+        self.thread.join()
+
+    # Queue depth per priority and time requests spent waiting in the queue
+    def stats(self):
+        with self._lock:
+            result = {}
+            for priority, name in PRIORITY_NAMES.items():
+                count, total, longest = self._waits[priority]
+                result[name] = {
+                    "queued": self._pending[priority],
+                    "served": count,
+                    "mean_wait_ms": total / count * 1000 if count else 0.0,
+                    "max_wait_ms": longest * 1000,
+                }
+            return result
+
+    def _execute(self, future, fn, args):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    def _run(self):
+        while True:
+            priority, _, queued_at, future, fn, args = self.queue.get()
+            if future is None:
+                return
+            wait = perf_counter() - queued_at
+            with self._lock:
+                self._pending[priority] -= 1
+                stats = self._waits[priority]
+                stats[0] += 1
+                stats[1] += wait
+                stats[2] = max(stats[2], wait)
+            # Motion queued before the emergency stop must not start the servos again
+            if priority == PRIORITY_MOTION and self.latched.is_set():
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(BusWorker.EmergencyStopped("Emergency stop is latched"))
+                continue
+            self._execute(future, fn, args)
@@ -0,0 +1,92 @@
+from motor.joint import wheel_speed_value
+
+# Speeds are rounded to a multiple of this many goal speed units
+SPEED_QUANTUM = 10
+# A new speed in the same direction goes out only when it differs this much from the last one sent
+SPEED_HYSTERESIS = 20
+
+
+# CommandCoalescer sits between MotorManager and the bus. During a control tick every
+# joint sets the speed it wants per servo; only the newest speed per servo is kept.
+# flush() then sends whatever still differs from what the servo already has, as one
+# sync write. Speeds are quantised and small changes in the same direction are held
+# back (hysteresis), so a joystick jittering around a value does not turn into a
+# stream of goal speed writes. Stopping and reversing always go out at once.
+class CommandCoalescer:
+    def __init__(self, bus, quantum=SPEED_QUANTUM, hysteresis=SPEED_HYSTERESIS):
+        self.bus = bus
+        self.quantum = max(1, quantum)
+        self.hysteresis = hysteresis
+        # Newest signed speed per servo id for this tick
+        self.pending = {}
+        # Signed speed per servo id the servos were last told
+        self.sent = {}
+        self.requested = 0
+        self.sent_count = 0
+        self.dropped = 0
+        self.flushes = 0
+
+    # Signed speed rounded to the quantum, never rounded down to a stop
+    def quantise(self, speed):
+        if speed == 0 or self.quantum == 1:
+            return speed
+        q = int(round(speed / self.quantum)) * self.quantum
+        return q if q != 0 else (self.quantum if speed > 0 else -self.quantum)
+
+    # Request a signed wheel speed for a servo, replacing any earlier request this tick
+    def set_speed(self, servo_id, speed):
+        self.requested += 1
+        if servo_id in self.pending:
+            self.dropped += 1
+        self.pending[servo_id] = self.quantise(speed)
+
+    # Request signed speeds for several servos
+    def set_speeds(self, speeds):
+        for servo_id, speed in speeds.items():
+            self.set_speed(servo_id, speed)
+
+    # True when speed has to be sent to a servo that was last sent last
+    def _changed(self, last, speed):
+        if last is None:
+            return True
+        if speed == last:
+            return False
+        # Stopping, starting and reversing are never held back
+        if speed == 0 or last == 0 or (speed > 0) != (last > 0):
+            return True
+        return abs(speed - last) >= self.hysteresis
+
+    # Send the pending speeds that changed as one sync write, returns the number sent
+    def flush(self):
+        if not self.pending:
+            return 0
+        values = {}
+        for servo_id, speed in self.pending.items():
+            if self._changed(self.sent.get(servo_id), speed):
+                values[servo_id] = wheel_speed_value(speed)
+                self.sent[servo_id] = speed
+            else:
+                self.dropped += 1
+        self.pending = {}
+        if values:
+            self.bus.syncMoveSpeed(values)
+            self.sent_count += len(values)
+            self.flushes += 1
+        return len(values)
+
+    # Forget what was sent to a servo (or all servos), so its next speed always goes out
+    def forget(self, servo_id=None):
+        if servo_id is None:
+            self.sent.clear()
+        else:
+            self.sent.pop(servo_id, None)
+
+    # Requested, sent and dropped speed commands and the number of sync writes
+    def stats(self):
+        return {
+            "requested": self.requested,
+            "sent": self.sent_count,
+            "dropped": self.dropped,
+            "packets": self.flushes,
+            "drop_ratio": self.dropped / self.requested if self.requested else 0.0,
+        }
@@ -0,0 +1,51 @@
+import sys
+import types
+
+# Stand-in for RPi.GPIO so the motor code runs on a machine without GPIO pins.
+# install() registers it as RPi.GPIO before ax12 is imported.
+
+BCM = "BCM"
+BOARD = "BOARD"
+OUT = 0
+IN = 1
+HIGH = 1
+LOW = 0
+
+# last value written to every pin
+pins = {}
+# number of output() calls, e.g. direction switches of the AX-12 bus
+writes = 0
+
+
+def setwarnings(flag):
+    pass
+
+
+def setmode(mode):
+    pass
+
+
+def setup(pin, mode, initial=LOW, pull_up_down=None):
+    pins[pin] = initial
+
+
+def output(pin, value):
+    global writes
+    pins[pin] = value
+    writes += 1
+
+
+def input(pin):
+    return pins.get(pin, LOW)
+
+
+def cleanup():
+    pins.clear()
+
+
+# Make "import RPi.GPIO as GPIO" return this module
+def install():
+    package = sys.modules.get("RPi") or types.ModuleType("RPi")
+    package.GPIO = sys.modules[__name__]
+    sys.modules["RPi"] = package
+    sys.modules["RPi.GPIO"] = sys.modules[__name__]
@@ -0,0 +1,117 @@
+import threading
+import time
+from motor.motor import Motor
+
+# Gripper states
+OPEN = "open"
+CLOSING = "closing"
+CLOSED = "closed"
+OPENING = "opening"
+
+# Number of load samples used for the stall detection
+STALL_WINDOW = 4
+# Load (present load register value) above which the gripper may be stalled on an object
+STALL_LOAD = 1300
+# Load change per second below which the load curve counts as flat
+STALL_SLOPE = 300
+# Longest time the gripper keeps closing without detecting a stall
+CLOSE_TIMEOUT = 2.0
+# Time the gripper runs to open fully
+OPEN_TIME = 2.0
+
+
+# Gripper runs the open/close sequence of the gripper motor as a state machine.
+# toggle() only requests a change and returns at once (it can be called from any
+# thread); tick() is called once per control loop tick and returns the signed speed
+# changes for the per-tick sync write, so the other joints keep moving meanwhile.
+#
+# While closing, every tick reads the load into a fixed size ring buffer. The gripper
+# has stalled on an object once the mean load is above STALL_LOAD and the slope over
+# the window has flattened out, which usually happens well before CLOSE_TIMEOUT.
+# The motor draws a current spike when it starts, so the buffer only fills once the load
+# stopped rising for the first time: after the spike has peaked, or right away when the
+# gripper already presses on the object.
+class Gripper:
+    def __init__(self, motor: Motor, speed, window=STALL_WINDOW, stall_load=STALL_LOAD, stall_slope=STALL_SLOPE):
+        self.motor = motor
+        self.speed = speed
+        self.stall_load = stall_load
+        self.stall_slope = stall_slope
+        self.state = OPEN
+        self.started = 0.0
+        self._requested = threading.Event()
+        # Ring buffer of (time, load) samples
+        self._times = [0.0] * window
+        self._loads = [0] * window
+        self._index = 0
+        self._count = 0
+        # Load of the previous sample until the startup spike has peaked, None afterwards
+        self._rising = None
+
+    @property
+    def closed(self):
+        return self.state in (CLOSING, CLOSED)
+
+    # Request the gripper to close when open and to open when closed
+    def toggle(self):
+        self._requested.set()
+
+    # Abandon a running open/close step (after an emergency stop), the gripper keeps its target state
+    def halt(self):
+        self._requested.clear()
+        if self.state == CLOSING:
+            self.state = CLOSED
+        elif self.state == OPENING:
+            self.state = OPEN
+
+    # Advance the state machine, returns {servo id: signed speed} for the speeds that changed
+    def tick(self, now=None):
+        if now is None:
+            now = time.monotonic()
+        if self._requested.is_set():
+            self._requested.clear()
+            return self._start(OPENING if self.closed else CLOSING, now)
+        if self.state == CLOSING:
+            if self._stalled(now) or now - self.started > CLOSE_TIMEOUT:
+                self.state = CLOSED
+                return {self.motor.id: 0}
+        elif self.state == OPENING and now - self.started > OPEN_TIME:
+            self.state = OPEN
+            return {self.motor.id: 0}
+        return {}
+
+    def _start(self, state, now):
+        self.state = state
+        self.started = now
+        self._index = 0
+        self._count = 0
+        self._rising = -1
+        self.motor.enable_torque()
+        return {self.motor.id: self.speed if state == CLOSING else -self.speed}
+
+    # Read the load into the ring buffer, True when the load is high and no longer changing
+    def _stalled(self, now):
+        load = abs(self.motor.ctrl.readLoad(self.motor.id))
+        if self._rising is not None:
+            if load > self._rising:
+                self._rising = load
+                return False
+            self._rising = None
+        size = len(self._loads)
+        self._times[self._index] = now
+        self._loads[self._index] = load
+        self._index = (self._index + 1) % size
+        self._count = min(self._count + 1, size)
+        if self._count < size:
+            return False
+        # self._index now points at the oldest sample
+        oldest = self._index
+        newest = self._index - 1
+        elapsed = self._times[newest] - self._times[oldest]
+        if elapsed <= 0:
+            return False
+        slope = (self._loads[newest] - self._loads[oldest]) / elapsed
+        return sum(self._loads) / size > self.stall_load and abs(slope) < self.stall_slope
+
+    def __repr__(self):
+        return f"<Gripper {self.state}: {self.motor}>"
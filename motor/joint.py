@@ -0,0 +1,77 @@
+from motor.motor import Motor
+
+
+# AX-12 goal speed register value for a signed wheel speed (bit 10 is the direction)
+def wheel_speed_value(speed, inverted=False):
+    if inverted:
+        speed = -speed
+    return speed if speed >= 0 else abs(speed) + 1024
+
+
+# A logical joint driven by several servos that always move together, e.g. the two
+# lift motors. Each servo can be mounted mirrored (inverted) and have a position
+# offset. Commands for all servos go out as one sync write packet, and the joint
+# keeps a single stopped/last speed state instead of one per servo.
+class Joint:
+    def __init__(self, name, motors: list[Motor], inverted=None, offsets=None):
+        self.name = name
+        self.motors = list(motors)
+        self.inverted = list(inverted or [False] * len(self.motors))
+        self.offsets = list(offsets or [0] * len(self.motors))
+        self.stopped = False
+        self.last_speed = None
+
+    # Signed speed of every servo for a signed joint speed
+    def signed_speeds(self, speed):
+        return {m.id: -speed if inv else speed for m, inv in zip(self.motors, self.inverted)}
+
+    # Goal speed register values of every servo for a signed joint speed
+    def speed_values(self, speed):
+        return {m.id: wheel_speed_value(speed, inv) for m, inv in zip(self.motors, self.inverted)}
+
+    # Goal position register values of every servo for a joint position
+    def position_values(self, position):
+        values = {}
+        for m, inv, offset in zip(self.motors, self.inverted, self.offsets):
+            p = (1023 - position if inv else position) + offset
+            values[m.id] = max(0, min(1023, p))
+        return values
+
+    # Signed speeds of every servo for this joint speed, or an empty dict when the joint
+    # already runs at it. MotorManager hands the result to the coalescer every tick.
+    def update(self, speed):
+        if speed == 0:
+            if self.stopped:
+                return {}
+            self.stopped = True
+            self.last_speed = 0
+            return self.signed_speeds(0)
+        if speed == self.last_speed:
+            return {}
+        self.last_speed = speed
+        self.stopped = False
+        return self.signed_speeds(speed)
+
+    # Forget the last speed (after an emergency stop), the next update always goes out
+    def forget(self):
+        self.stopped = False
+        self.last_speed = None
+
+    # Drive the joint at a signed wheel speed on its own, outside the control loop
+    def drive(self, speed):
+        if self.update(speed):
+            self.motors[0].ctrl.syncMoveSpeed(self.speed_values(speed))
+
+    def stop(self):
+        self.drive(0)
+
+    # Move every servo to the joint position at speed, in one sync write
+    def move_to(self, position, speed):
+        data = {}
+        for motor_id, p in self.position_values(position).items():
+            data[motor_id] = (p & 0xff, p >> 8, speed & 0xff, speed >> 8)
+        self.motors[0].ctrl.syncWrite(self.motors[0].ctrl.AX_GOAL_POSITION_L, data)
+        self.forget()
+
+    def __repr__(self):
+        return f"<Joint {self.name}: {self.motors}>"
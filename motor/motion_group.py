@@ -0,0 +1,45 @@
+from motor.bus_worker import PRIORITY_MOTION
+
+
+# MotionGroup starts several motors at the same moment: goal position and speed are
+# staged on every servo with REG_WRITE and released together by one broadcast ACTION.
+class MotionGroup:
+    def __init__(self, motors):
+        self.motors = list(motors)
+        # motor id -> (motor, position, speed)
+        self.staged = {}
+
+    # Stage a goal for one motor of the group (position None: speed only, for wheel mode)
+    def stage(self, motor, position, speed):
+        if motor not in self.motors:
+            raise ValueError(f"{motor} is not part of this motion group")
+        self.staged[motor.id] = (motor, position, speed)
+
+    # Stage the same goal for every motor
+    def stage_all(self, position, speed):
+        for motor in self.motors:
+            self.stage(motor, position, speed)
+
+    # Send the staged goals and start them with one ACTION
+    def release(self):
+        if not self.staged:
+            return
+        ctrl = self.motors[0].ctrl
+        # On the bus worker the whole group is one job, so nothing gets between the writes and ACTION
+        if hasattr(ctrl, "submit"):
+            ctrl.submit(PRIORITY_MOTION, self._release).result()
+        else:
+            self._release()
+
+    # Stage goals for several motors ({motor: (position, speed)}) and start them together
+    def move(self, goals):
+        for motor, (position, speed) in goals.items():
+            self.stage(motor, position, speed)
+        self.release()
+
+    def _release(self):
+        staged = list(self.staged.values())
+        self.staged.clear()
+        for motor, position, speed in staged:
+            motor.stage_move(position, speed)
+        staged[0][0].ctrl.action()
@@ -1,11 +1,11 @@
-from ax12 import Ax12
+from motor.ax12 import Ax12
 
 # Motor class for controlling the motors using the Ax12 library
 class Motor:
     # Initialize the motor with its ID, controller, and name
     def __init__(self, motor_id, controller: Ax12, name=""):
         self.id = motor_id
-        # Assign the controller instance to the motor
+        # Assign the controller instance to the motor (an Ax12 or the BusWorker serving it)
         self.ctrl = controller
         self.name = name or f"Motor-{motor_id}"
 
@@ -15,12 +15,20 @@ class Motor:
     # move to a specific position
     def move_to(self, position):
         self.ctrl.move(self.id, position)
+    # Stage a move that starts on the next broadcast ACTION (position None: speed only, wheel mode)
+    def stage_move(self, position, speed):
+        if position is None:
+            return self.ctrl.speedRW(self.id, speed)
+        return self.ctrl.moveSpeedRW(self.id, position, speed)
     # Stop the motor
     def stop(self):
-        self.ctrl.moveSpeed(self.id, 0, 0)
+        self.ctrl.stop(self.id)
     # Read the current position of the motor
     def read_position(self):
         return self.ctrl.readPosition(self.id)
+    # Read position, speed, load, voltage, temperature and moving status in one go
+    def read_state(self):
+        return self.ctrl.readState(self.id)
     # Read the current data from the motor
     def read_data(self):
         return self.ctrl.readData(self.id)
@@ -34,8 +42,14 @@ class Motor:
     def limit(self):
         self.ctrl.setAngleLimit(self.id, 0, 1023)
     # Set the motor to wheel mode, which disables angle limits
+    # (skips the EEPROM write when the servo is already in wheel mode)
     def set_wheel_mode(self):
+        if self.is_wheel_mode():
+            return
         self.ctrl.setAngleLimit(self.id, 0, 0)
+    # Wheel mode means both angle limits are 0, read in one go
+    def is_wheel_mode(self):
+        return self.ctrl.read_register(self.id, Ax12.AX_CW_ANGLE_LIMIT_L, 4) == 0
 
     def __repr__(self):
         return f"<{self.name} (ID: {self.id})>"
@@ -1,6 +1,17 @@
+import threading
 import time
+from collections import deque
 from joystick.joystick_registry import registry as joystick_registry
-from motor.motor_registry import MotorRegistry
+from joystick.sensor_registry import registry as sensor_registry
+from motor.bus_worker import BusWorker
+from motor.coalescer import SPEED_HYSTERESIS, SPEED_QUANTUM, CommandCoalescer
+from motor.gripper import Gripper
+from motor.joint import Joint
+from motor.motor_registry import SERVO_CACHE_FILE, MotorRegistry
+from motor.speed_curve import SpeedCurve
+from motor.speed_governor import SpeedGovernor
+from motor.telemetry import TelemetryService
+from recording.session_replay import summary
 
 # Joystick idle minimum value of the joystick (not moving)
 IDLE_MIN = 2200
@@ -18,34 +29,72 @@ MAX_SPEED_GRIPPER = 150
 CENTER = (IDLE_MIN + IDLE_MAX) // 2
 # Torque threshold for the gripper motor to determine if the gripper is as closed as possible
 TORQUE_THRESHOLD = 1300
+# Default rate of the control loop in Hz
+CONTROL_RATE = 100
 
 # MotorManager class for managing the motors
 class MotorManager:
-    # Initializes the MotorManager with a registry of motors and joystick states
-    def __init__(self):
-        self.registry = MotorRegistry()
-        self.motor_states = {name: {"stopped": False, "last_speed": None} for name in self.registry.motor_names()}
-        self.gripper_state = False
+    # Initializes the MotorManager with a registry of motors and joystick states.
+    # cache_file is where the registry keeps the servo ids it found.
+    def __init__(self, curves=None, quantum=SPEED_QUANTUM, hysteresis=SPEED_HYSTERESIS, recorder=None,
+                 cache_file=SERVO_CACHE_FILE):
+        self.registry = MotorRegistry(cache_file)
+        # Records every packet sent to the servos from here on
+        if recorder is not None:
+            self.registry.ax.setRecorder(recorder)
+        # Joystick to speed curve per joint/motor name, the default curve for everything else
+        self.default_curve = self.make_curve()
+        self.curves = dict(curves or {})
+        # Limits the joystick driven speeds when the ToF sensors see something close by
+        self.governor = SpeedGovernor(sensor_registry)
         self.joystick_pressed_state = False
-        self.prev_j1_pressed = 0
+        # Keeps the newest speed per servo during one update and sends the changes as a single sync write
+        self.coalescer = CommandCoalescer(self.registry.bus, quantum, hysteresis)
+        # Both lift motors move as one joint
+        lift_motors = [m for m in (self.registry.get("up_down_motor_1"), self.registry.get("up_down_motor_2")) if m]
+        self.lift = Joint("lift", lift_motors) if lift_motors else None
+        # The gripper opens and closes on its own over several control ticks
+        gripper_motor = self.registry.get("gripper_motor")
+        self.gripper = Gripper(gripper_motor, MAX_SPEED_GRIPPER, stall_load=TORQUE_THRESHOLD) if gripper_motor else None
+        # Background servo telemetry, started together with the control loop
+        self.telemetry = TelemetryService(self.registry)
+        # Seconds spent waiting on the bus since the control loop last reset it
+        self.bus_time = 0.0
+        # Set by the joystick listener, the joysticks are only mapped to speeds again after a change
+        self.input_changed = True
+        # Set by clear_emergency_stop(), the next update releases the emergency stop
+        self.release_requested = False
         self._get_joysticks()
+        joystick_registry.subscribe(self._on_joystick)
 
     # gets the joysticks from the joystick registry
     def _get_joysticks(self):
         self.j1 = joystick_registry.get("J2")
         self.j2 = joystick_registry.get("J1")
 
-    # Maps joystick axis value to motor speed
-    def _map_joystick_to_speed(self, value):
-        # if the joystick value is within the idle range, return 0 speed
-        if IDLE_MIN <= value <= IDLE_MAX:
-            return 0
-        # Normalize the joystick value to a speed value
-        delta = value - CENTER
-        # if the delta is positive, normalize it by the maximum range above center, otherwise normalize it by the maximum range below center
-        normalized = delta / (JOYSTICK_MAX - CENTER) if delta > 0 else delta / (CENTER - JOYSTICK_MIN)
-        # Scale the normalized value to the maximum speed
-        return int(max(-1, min(1, normalized)) * MAX_SPEED_REGULAR)
+    # Joystick listener, runs on the joystick reader thread: keep the new state for the next tick
+    def _on_joystick(self, event):
+        if event.name == "J2":
+            self.j1 = event.joystick
+            # Toggle the joystick pressed state when the button goes down
+            if event.pressed:
+                self.joystick_pressed_state = not self.joystick_pressed_state
+        elif event.name == "J1":
+            self.j2 = event.joystick
+        else:
+            return
+        self.input_changed = True
+
+    # Builds a speed curve, by default the linear curve between the joystick constants above
+    @staticmethod
+    def make_curve(max_speed=MAX_SPEED_REGULAR, expo=0.0, gain=1.0, idle_min=IDLE_MIN, idle_max=IDLE_MAX):
+        return SpeedCurve(idle_min, idle_max, max_speed, expo, gain, JOYSTICK_MIN, JOYSTICK_MAX)
+
+    # Maps joystick axis value to motor speed with the curve of the given joint/motor,
+    # limited by the speed governor relative to the top speed of that curve
+    def _map_joystick_to_speed(self, value, name=None):
+        curve = self.curves.get(name, self.default_curve)
+        return self.governor.apply(curve.speed(value), curve.max_speed)
 
     # Drives a motor based on the joystick axis value
     def _drive_motor(self, motor_name, axis_value):
@@ -53,99 +102,193 @@ class MotorManager:
         motor = self.registry.get(motor_name)
         if not motor:
             return
+        # Map the joystick axis value to a speed, the coalescer decides if it has to be sent
+        self.coalescer.set_speed(motor.id, self._map_joystick_to_speed(axis_value, motor_name))
 
-        # Map the joystick axis value to a speed
-        speed = self._map_joystick_to_speed(axis_value)
-        # Get the current state of the motor for stopping logic
-        state = self.motor_states[motor_name]
-
-        # If the speed is 0, stop the motor if it was previously moving
-        if speed == 0:
-            if not state["stopped"]:
-                motor.stop()
-                state["stopped"] = True
-                state["last_speed"] = 0
+    # Drives a joint based on the joystick axis value
+    def _drive_joint(self, joint, axis_value):
+        if not joint:
             return
-
-        # If the speed is different from the last speed, move the motor
-        if speed != state["last_speed"]:
-            motor.move(motor.id, speed if speed > 0 else abs(speed) + 1024)
-            # Update the state to reflect the motor is now moving
-            state["last_speed"] = speed
-            state["stopped"] = False
+        self.coalescer.set_speeds(joint.update(self._map_joystick_to_speed(axis_value, joint.name)))
 
     # Updates the motor states based on joystick inputs
     def update_from_joysticks(self):
+        # A release asked for since the last update is done here, on the control loop thread
+        if self.release_requested:
+            self.release_emergency_stop()
         # Ensure both joysticks are available
         if not self.j1 or not self.j2:
             return
+        # Nothing moves while the emergency stop is latched
+        if self.emergency_stopped:
+            return
 
-        # Toggle the joystick pressed state if the button is pressed
-        if self.j1.pressed == 1 and self.prev_j1_pressed == 0:
-            self.joystick_pressed_state = not self.joystick_pressed_state
-        self.prev_j1_pressed = self.j1.pressed
+        # A new speed limit from the ToF distances maps the joysticks again
+        limit = self.governor.speed_limit
+        if self.governor.limit() != limit:
+            self.input_changed = True
 
-        # Drive the motors based on joystick inputs
-        self._drive_motor("up_down_motor_1", self.j1.x)
-        self._drive_motor("up_down_motor_2", self.j1.x)
-        self._drive_motor("arm_in_out_motor", self.j2.x)
+        # Only map the joysticks when they changed since the last update. The flag is
+        # cleared first, so a change that comes in while mapping is seen next time.
+        if self.input_changed:
+            self.input_changed = False
+            j1, j2 = self.j1, self.j2
+            # Drive the motors based on joystick inputs
+            self._drive_joint(self.lift, j1.x)
+            self._drive_motor("arm_in_out_motor", j2.x)
 
-        # Depending on the joystick pressed state, drive different motors
-        if self.joystick_pressed_state:
-            self._drive_motor("gripper_move_motor", self.j2.y)
-        else:
-            self._drive_motor("turn_base_motor", self.j2.y)
+            # Depending on the joystick pressed state, drive different motors
+            if self.joystick_pressed_state:
+                self._drive_motor("gripper_move_motor", j2.y)
+            else:
+                self._drive_motor("turn_base_motor", j2.y)
 
-    # Toggles the gripper state by moving the gripper motor
-    def toggle_gripper(self):
-        # Get the gripper motor from the registry
-        motor = self.registry.get("gripper_motor")
-        if not motor:
+        # Let a running gripper open/close step continue, its load reads count as bus time
+        if self.gripper:
+            start = time.perf_counter()
+            self.coalescer.set_speeds(self.gripper.tick())
+            self.bus_time += time.perf_counter() - start
+
+        self._flush_speeds()
+
+    # Sends all speed changes of this update to the bus in one sync write packet
+    def _flush_speeds(self):
+        if not self.coalescer.pending:
             return
+        start = time.perf_counter()
+        try:
+            self.coalescer.flush()
+        except BusWorker.EmergencyStopped:
+            # The emergency stop came in during this update, the speeds are sent again once cleared
+            pass
+        self.bus_time += time.perf_counter() - start
 
-        # Enable the motor torque before moving
-        motor.enable_torque()
+    # True while the emergency stop is latched
+    @property
+    def emergency_stopped(self):
+        return self.registry.bus.latched.is_set()
 
-        # If the gripper is not engaged, move it to close, otherwise move it to open
-        if not self.gripper_state:
-            motor.move(motor.id, MAX_SPEED_GRIPPER)
-            # Wait until the torque limit is reached or timeout occurs
-            self._wait_until_torque_limit(motor)
-        else:
-            motor.move(motor.id, 1024 + MAX_SPEED_GRIPPER)
-            time.sleep(2.0)
-            motor.stop()
-
-        # Toggle the gripper state
-        self.gripper_state = not self.gripper_state
-
-    # Waits until the torque limit is reached or a timeout occurs
-    def _wait_until_torque_limit(self, motor):
-        # Initialize a buffer to store load values
-        load_buffer = []
-        # Start a timer to limit the waiting time
-        start_time = time.time()
-        # Continuously read the load from the motor until the torque limit is reached or timeout occurs
-        while True:
-            # Read the load from the motor and append it to the buffer
-            load = abs(motor.ctrl.readLoad(motor.id))
-            load_buffer.append(load)
-            # If the buffer exceeds 5 values, remove the oldest one
-            if len(load_buffer) > 5:
-                load_buffer.pop(0)
-
-            # Calculate the average load from the buffer
-            avg_load = sum(load_buffer) / len(load_buffer)
-
-            # If the average load exceeds the torque threshold and enough time has passed, stop the motor
-            if time.time() - start_time > 0.2 and avg_load > TORQUE_THRESHOLD:
-                motor.stop()
-                break
-
-            # If the elapsed time exceeds 2 seconds, stop the motor and exit the loop
-            if time.time() - start_time > 2.0:
-                motor.stop()
-                break
-
-            # Small delay to allow the motors to respond smoothly
-            time.sleep(0.01)
\ No newline at end of file
+    # Stops every servo with one broadcast packet ahead of any queued bus work. Stays
+    # latched until clear_emergency_stop(). Returns the Future of the stop packet.
+    def emergency_stop(self):
+        self.release_requested = False
+        ids = [m.id for m in self.registry.motors.values()]
+        future = self.registry.bus.emergency_stop(ids)
+        if self.gripper:
+            self.gripper.halt()
+        return future
+
+    # Asks the control loop to release the emergency stop on its next update, so the UI
+    # thread does not wait for the torque writes or reset the coalescer during a tick
+    def clear_emergency_stop(self):
+        self.release_requested = True
+
+    # Releases the emergency stop: torque back on, every speed is sent again on the next
+    # update. Called by update_from_joysticks(), without a control loop call it directly.
+    def release_emergency_stop(self):
+        self.release_requested = False
+        self.registry.bus.clear_emergency_stop()
+        self.coalescer.pending = {}
+        self.forget_sent()
+        self.input_changed = True
+        for motor in self.registry.motors.values():
+            motor.enable_torque()
+
+    # Forget the speeds the servos were last sent, every speed goes out again on the next update
+    def forget_sent(self):
+        self.coalescer.forget()
+        if self.lift:
+            self.lift.forget()
+
+    # True when the gripper is closed or closing
+    @property
+    def gripper_state(self):
+        return self.gripper.closed if self.gripper else False
+
+    # Toggles the gripper between open and closed, the control loop runs the movement
+    def toggle_gripper(self):
+        if self.gripper:
+            self.gripper.toggle()
+
+
+# ControlLoop runs MotorManager.update_from_joysticks at a fixed rate on its own thread.
+# Every tick works on whatever joystick state the registry holds at that moment, so the
+# control rate no longer depends on when the controller sends a line. Deadlines are
+# kept on the monotonic clock; a tick that starts more than one period late counts as
+# a missed deadline and the schedule skips ahead instead of running a burst of ticks.
+class ControlLoop:
+    # Number of recent ticks kept for the percentiles in stats()
+    HISTORY = 1000
+
+    def __init__(self, manager: MotorManager, rate=CONTROL_RATE):
+        self.manager = manager
+        self.period = 1.0 / rate
+        self.running = False
+        self.thread = None
+        self.ticks = 0
+        self.missed = 0
+        self.errors = 0
+        # (jitter, tick time, bus time) in seconds of the last HISTORY ticks
+        self.history = deque(maxlen=self.HISTORY)
+
+    @property
+    def rate(self):
+        return 1.0 / self.period
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name="control-loop", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+    # Run one control tick, returns (tick time, bus time) in seconds
+    def tick(self):
+        manager = self.manager
+        manager.bus_time = 0.0
+        start = time.perf_counter()
+        try:
+            manager.update_from_joysticks()
+        except Exception as e:
+            self.errors += 1
+            print(f"Control loop tick failed: {e}")
+        return time.perf_counter() - start, manager.bus_time
+
+    def _run(self):
+        period = self.period
+        deadline = time.monotonic()
+        while self.running:
+            now = time.monotonic()
+            if now < deadline:
+                time.sleep(deadline - now)
+                now = time.monotonic()
+            jitter = now - deadline
+            tick_time, bus_time = self.tick()
+            self.ticks += 1
+            self.history.append((jitter, tick_time, bus_time))
+            deadline += period
+            # Running a full period or more behind: count the missed ticks and resync
+            late = time.monotonic() - deadline
+            if late >= period:
+                skipped = int(late / period)
+                self.missed += skipped
+                deadline += skipped * period
+
+    # Rate, missed deadlines, loop jitter and per tick time on and off the bus in ms
+    def stats(self):
+        history = list(self.history)
+        return {
+            "rate": self.rate,
+            "ticks": self.ticks,
+            "missed": self.missed,
+            "errors": self.errors,
+            "jitter_ms": summary([h[0] for h in history]),
+            "tick_ms": summary([h[1] for h in history]),
+            "bus_ms": summary([h[2] for h in history]),
+        }
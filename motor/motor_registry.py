@@ -1,16 +1,27 @@
-from ax12 import Ax12
+import json
+import os
+from motor.ax12 import Ax12
+from motor.bus_worker import BusWorker
 from motor.motor import Motor
 
+# Servo ids the arm is built from, scanned when the cached set does not answer
+SERVO_IDS = range(2, 8)
+# File with the servo ids found on the last start
+SERVO_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".botos_servos.json")
+
 class MotorRegistry:
     # A registry for managing motors
-    def __init__(self):
+    def __init__(self, cache_file=SERVO_CACHE_FILE):
+        self.cache_file = cache_file
         self.ax = Ax12()
+        # every bus access goes through the bus worker thread
+        self.bus = BusWorker(self.ax)
         self.motors = {}
         self._initialize_motors()
 
     # Initialize motors by searching for their IDs and registering them
     def _initialize_motors(self):
-        found_ids = self.ax.learnServos(2, 7, verbose=True)
+        found_ids = self._discover_servos()
         for i in found_ids:
             print(f"Found motor with ID: {i}")
             match i:
@@ -27,8 +38,35 @@ class MotorRegistry:
                 case 4:
                     self._register("up_down_motor_2", i)
 
+    # Find the connected servos: ping the ids of the last start first and only scan
+    # all ids when one of them does not answer
+    def _discover_servos(self):
+        cached = self._load_cached_ids()
+        if cached:
+            found = self.bus.pingServos(cached)
+            if found == cached:
+                return found
+            print(f"Cached servos {cached} did not all answer, scanning")
+        found = self.bus.pingServos(SERVO_IDS)
+        self._save_cached_ids(found)
+        return found
+
+    def _load_cached_ids(self):
+        try:
+            with open(self.cache_file) as f:
+                return [int(i) for i in json.load(f)]
+        except (OSError, ValueError, TypeError):
+            return []
+
+    def _save_cached_ids(self, ids):
+        try:
+            with open(self.cache_file, "w") as f:
+                json.dump(ids, f)
+        except OSError as e:
+            print(f"Could not write servo cache: {e}")
+
     def _register(self, name, motor_id):
-        motor = Motor(motor_id, self.ax, name)
+        motor = Motor(motor_id, self.bus, name)
         motor.set_wheel_mode()
         self.motors[name] = motor
 
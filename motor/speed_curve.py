@@ -0,0 +1,45 @@
+import numpy as np
+
+# Number of values the joystick ADC can report (12 bit)
+ADC_RANGE = 4096
+
+
+# SpeedCurve turns a raw joystick axis value into a signed motor speed by a single
+# lookup in a table that is built once with NumPy. The curve has a deadband around
+# the idle position, an expo term for finer control around the center, a gain and a
+# maximum speed, so the feel of every joint can be tuned without changing the code
+# that runs every control tick.
+class SpeedCurve:
+    def __init__(self, idle_min, idle_max, max_speed, expo=0.0, gain=1.0, joystick_min=0, joystick_max=ADC_RANGE - 1):
+        self.idle_min = idle_min
+        self.idle_max = idle_max
+        self.max_speed = max_speed
+        # 0 is linear, 1 is fully cubic
+        self.expo = expo
+        self.gain = gain
+        self.joystick_min = joystick_min
+        self.joystick_max = joystick_max
+        self.table = self._build_table()
+
+    # Speed for every possible axis value, as a list of plain ints for fast indexing
+    def _build_table(self):
+        values = np.arange(ADC_RANGE, dtype=np.float64)
+        center = (self.idle_min + self.idle_max) // 2
+        # Normalize to -1..1 by the range above or below the center
+        above = (values - center) / (self.joystick_max - center)
+        below = (values - center) / (center - self.joystick_min)
+        normalized = np.clip(np.where(values > center, above, below), -1.0, 1.0)
+        curved = (1.0 - self.expo) * normalized + self.expo * normalized ** 3
+        speeds = np.trunc(np.clip(curved * self.gain, -1.0, 1.0) * self.max_speed).astype(np.int64)
+        speeds[self.idle_min:self.idle_max + 1] = 0
+        return speeds.tolist()
+
+    # Signed speed for a raw axis value
+    def speed(self, value):
+        if 0 <= value < ADC_RANGE:
+            return self.table[value]
+        return self.table[0] if value < 0 else self.table[-1]
+
+    def __repr__(self):
+        return (f"<SpeedCurve deadband={self.idle_min}-{self.idle_max} max={self.max_speed} "
+                f"expo={self.expo} gain={self.gain}>")
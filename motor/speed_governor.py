@@ -0,0 +1,65 @@
+import numpy as np
+
+# Distance (mm) from which the joints may move at full speed
+SLOW_DISTANCE = 400
+# Distance (mm) at and below which the joints only creep
+STOP_DISTANCE = 60
+# Speed left at STOP_DISTANCE, never 0 so the operator can still move away from the obstacle
+CREEP_SPEED = 100
+# Highest speed an Ax12 takes in wheel mode
+MAX_SPEED = 1023
+# Resolution of the distance table in mm
+DISTANCE_STEP = 10
+
+
+# SpeedGovernor limits joint speeds by the nearest ToF distance: full speed in open space,
+# slowing down linearly between SLOW_DISTANCE and STOP_DISTANCE and creeping below it.
+# The limit for every distance is looked up in a table built once with NumPy, so a
+# control tick only costs finding the nearest sensor and one list index. The sensors do
+# not tell which way a joint moves towards the obstacle, so the limit applies both ways.
+# The table is in MAX_SPEED terms; apply() scales it to the top speed of the caller's
+# speed curve, so every curve slows down from slow_distance on and is left alone when
+# nothing is near.
+class SpeedGovernor:
+    def __init__(self, sensors, sensor_ids=None, slow_distance=SLOW_DISTANCE, stop_distance=STOP_DISTANCE,
+                 creep_speed=CREEP_SPEED, max_speed=MAX_SPEED, step=DISTANCE_STEP):
+        self.sensors = sensors
+        # Sensors that govern the speed, None for all of them
+        self.sensor_ids = set(sensor_ids) if sensor_ids is not None else None
+        self.max_speed = max_speed
+        self.step = step
+        self.table = self._build_table(slow_distance, stop_distance, creep_speed)
+        # Nearest distance and speed limit of the last limit() call
+        self.nearest = None
+        self.speed_limit = max_speed
+
+    # Speed limit for every step of distance up to slow_distance, as a list of plain ints
+    def _build_table(self, slow_distance, stop_distance, creep_speed):
+        distances = np.arange(0, slow_distance + self.step, self.step)
+        limits = np.interp(distances, [stop_distance, slow_distance], [creep_speed, self.max_speed])
+        return np.trunc(limits).astype(np.int64).tolist()
+
+    # The speed limit for a distance in mm, max_speed when the distance is None (nothing near)
+    def limit_for(self, distance):
+        if distance is None:
+            return self.max_speed
+        index = distance // self.step
+        return self.table[index] if index < len(self.table) else self.max_speed
+
+    # The speed limit for the current distances
+    def limit(self, now=None):
+        self.nearest = self.sensors.nearest(self.sensor_ids, now)
+        self.speed_limit = self.limit_for(self.nearest)
+        return self.speed_limit
+
+    # A signed speed clamped to the last limit, scaled to a curve with top speed max_speed
+    def apply(self, speed, max_speed=None):
+        limit = self.speed_limit
+        if limit >= self.max_speed:
+            return speed
+        if max_speed is not None:
+            limit = limit * max_speed // self.max_speed
+        return limit if speed > limit else -limit if speed < -limit else speed
+
+    def stats(self):
+        return {"nearest": self.nearest, "speed_limit": self.speed_limit}
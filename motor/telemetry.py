@@ -0,0 +1,134 @@
+import threading
+import time
+from array import array
+from collections import namedtuple
+from motor.ax12 import Ax12
+from motor.bus_worker import PRIORITY_TELEMETRY
+from motor.motor_registry import MotorRegistry
+
+# Register groups read in one block each: name: (start register, ((field, width), ...))
+GROUPS = {
+    "motion": (Ax12.AX_PRESENT_POSITION_L, (("position", 2), ("speed", 2), ("load", 2))),
+    "health": (Ax12.AX_PRESENT_VOLTAGE, (("voltage", 1), ("temperature", 1))),
+}
+FIELDS = tuple(field for _, fields in GROUPS.values() for field, _ in fields)
+# Seconds between two reads of a group on the same servo
+DEFAULT_INTERVALS = {"motion": 0.05, "health": 1.0}
+# How long the poller backs off while motion commands are waiting for the bus
+BUSY_WAIT = 0.001
+
+# Telemetry of one servo; speed and load are raw register values (bit 10 is the direction),
+# motion_time/health_time the monotonic time of the last successful read of that group
+ServoTelemetry = namedtuple("ServoTelemetry", ("id",) + FIELDS + tuple(g + "_time" for g in GROUPS))
+
+
+# A read-only view of the telemetry of all servos at one moment. Every field is a
+# read-only memoryview over an array indexed like ids, so readers can keep a
+# snapshot as long as they like while the service publishes newer ones.
+class TelemetrySnapshot:
+    __slots__ = ("ids", "time", "fields", "times", "_index")
+
+    def __init__(self, ids, fields, times):
+        set_ = object.__setattr__
+        set_(self, "ids", tuple(ids))
+        set_(self, "time", time.monotonic())
+        set_(self, "fields", {name: memoryview(array(values.typecode, values)).toreadonly() for name, values in fields.items()})
+        set_(self, "times", {name: memoryview(array(values.typecode, values)).toreadonly() for name, values in times.items()})
+        set_(self, "_index", {servo_id: i for i, servo_id in enumerate(self.ids)})
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TelemetrySnapshot is read-only")
+
+    def __getattr__(self, name):
+        try:
+            return object.__getattribute__(self, "fields")[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    # Telemetry of one servo, None for unknown ids
+    def get(self, servo_id):
+        i = self._index.get(servo_id)
+        if i is None:
+            return None
+        return ServoTelemetry(servo_id, *(self.fields[f][i] for f in FIELDS), *(self.times[g][i] for g in GROUPS))
+
+    def __repr__(self):
+        return f"<TelemetrySnapshot {len(self.ids)} servos at {self.time:.3f}>"
+
+
+# TelemetryService polls every registered motor in the background and publishes a new
+# TelemetrySnapshot after every read. Position, speed and load are read often, voltage
+# and temperature rarely (see DEFAULT_INTERVALS). Reads are submitted to the bus worker
+# at telemetry priority one at a time and only while no motion or stop command is
+# waiting, so polling never holds up more than the single read on the wire.
+class TelemetryService:
+    def __init__(self, registry: MotorRegistry, intervals=None):
+        self.registry = registry
+        self.bus = registry.bus
+        self.intervals = {**DEFAULT_INTERVALS, **(intervals or {})}
+        self.ids = tuple(sorted(m.id for m in registry.motors.values()))
+        self._index = {servo_id: i for i, servo_id in enumerate(self.ids)}
+        self._fields = {f: array("i", [0] * len(self.ids)) for f in FIELDS}
+        self._times = {g: array("d", [0.0] * len(self.ids)) for g in GROUPS}
+        # Next due time of every (servo id, group)
+        self._due = {(servo_id, group): 0.0 for servo_id in self.ids for group in GROUPS}
+        self.snapshot = TelemetrySnapshot(self.ids, self._fields, self._times)
+        self.reads = 0
+        self.errors = 0
+        # Times the poller waited for motion commands to clear the bus
+        self.deferred = 0
+        self._stop = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None and self.ids:
+            self._stop.clear()
+            self.thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self.thread:
+            self.thread.join()
+        self.thread = None
+
+    # Read one register group of a servo and publish a new snapshot, True on success
+    def poll(self, servo_id, group):
+        start, fields = GROUPS[group]
+        length = sum(width for _, width in fields)
+        try:
+            data = self.bus.submit(PRIORITY_TELEMETRY, self.registry.ax.readBlock, servo_id, start, length).result()
+        except (Ax12.timeoutError, Ax12.axError):
+            self.errors += 1
+            return False
+        i = self._index[servo_id]
+        offset = 0
+        for field, width in fields:
+            self._fields[field][i] = (data[offset] | (data[offset + 1] << 8)) if width == 2 else data[offset]
+            offset += width
+        self._times[group][i] = time.monotonic()
+        self.reads += 1
+        self.snapshot = TelemetrySnapshot(self.ids, self._fields, self._times)
+        return True
+
+    def _run(self):
+        due = self._due
+        while not self._stop.is_set():
+            key = min(due, key=due.get)
+            delay = due[key] - time.monotonic()
+            if delay > 0 and self._stop.wait(delay):
+                return
+            # Leave the bus to motion commands
+            while self.bus.busy(PRIORITY_TELEMETRY):
+                self.deferred += 1
+                if self._stop.wait(BUSY_WAIT):
+                    return
+            servo_id, group = key
+            self.poll(servo_id, group)
+            # Skip ahead when the bus could not keep up instead of polling in a burst
+            due[key] = max(due[key] + self.intervals[group], time.monotonic())
+
+    # Read and error counters of the poller
+    def stats(self):
+        return {"reads": self.reads, "errors": self.errors, "deferred": self.deferred}
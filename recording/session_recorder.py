@@ -0,0 +1,171 @@
+import queue
+import struct
+import threading
+import time
+from collections import namedtuple
+
+# Session files: a header followed by length prefixed records, only ever appended to.
+#
+#   header   MAGIC, then the wall clock time (float64) the session started
+#   record   kind (uint8), monotonic time since the session started in ns (int64),
+#            payload length (uint32), payload
+#
+# All values are little endian. A record cut off at the end of the file (the program
+# was killed while writing) is ignored when reading. Frames are encoded and written by
+# their own thread, so a frame can come after records with a later time.
+
+MAGIC = b"BOTSESS1"
+HEADER = struct.Struct("<8sd")
+RECORD = struct.Struct("<BqI")
+
+# Record kinds: raw bytes read from the controller's serial port, packets the Ax12
+# driver put on the bus and camera frames as JPEG
+CONTROLLER = 1
+BUS_TX = 2
+FRAME = 3
+KIND_NAMES = {CONTROLLER: "controller", BUS_TX: "bus_tx", FRAME: "frame"}
+
+# Records waiting for the writer thread, more are dropped instead of slowing down the caller
+MAX_QUEUE = 1000
+# Raw camera frames waiting to be encoded (about 1 MB each), kept apart from the records
+# above so a slow encoder drops frames instead of controller input and bus packets
+MAX_FRAMES = 4
+
+# One record of a session, time is in seconds since the session started
+SessionRecord = namedtuple("SessionRecord", ["kind", "time", "data"])
+
+
+# SessionRecorder writes the controller input, bus packets and camera frames of a session
+# to one file. record() and frame() only timestamp the data and queue it. A writer thread
+# writes the records, a frame thread encodes the frames to JPEG and writes them, so
+# recording costs the control loop and the camera next to nothing.
+class SessionRecorder:
+    def __init__(self, path, max_queue=MAX_QUEUE, max_frames=MAX_FRAMES):
+        self.path = path
+        self.queue = queue.Queue(max_queue)
+        self.frames = queue.Queue(max_frames)
+        self.running = False
+        self.threads = []
+        self.file = None
+        # both threads write to the file, one complete record at a time
+        self.lock = threading.Lock()
+        self.start_ns = time.monotonic_ns()
+        self.records = {kind: 0 for kind in KIND_NAMES}
+        self.bytes = 0
+        self.dropped = 0
+        self.dropped_frames = 0
+        self.errors = 0
+
+    def start(self):
+        if not self.running:
+            self.file = open(self.path, "wb")
+            self.start_ns = time.monotonic_ns()
+            self.file.write(HEADER.pack(MAGIC, time.time()))
+            self.running = True
+            self.threads = [
+                threading.Thread(target=self._run, args=(self.queue,), name="session-recorder", daemon=True),
+                threading.Thread(target=self._run, args=(self.frames,), name="session-frames", daemon=True),
+            ]
+            for thread in self.threads:
+                thread.start()
+        return self
+
+    # Write what is still queued and close the file
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.queue.put(None)
+        self.frames.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        self.file.close()
+        self.file = None
+
+    # Queue data of a kind with the current time
+    def record(self, kind, data):
+        if not self.running:
+            return
+        try:
+            self.queue.put_nowait((kind, time.monotonic_ns() - self.start_ns, data, None))
+        except queue.Full:
+            self.dropped += 1
+
+    # Bytes read from the controller's serial port
+    def controller(self, data):
+        self.record(CONTROLLER, bytes(data))
+
+    # A packet put on the servo bus (packets are reused buffers, so it is copied here)
+    def bus(self, packet):
+        self.record(BUS_TX, bytes(packet))
+
+    # A camera frame, encode turns it into JPEG bytes on the frame thread. The frame is
+    # copied because the detectors draw on it, unless the frame queue is full.
+    def frame(self, frame, encode):
+        if not self.running:
+            return
+        if self.frames.full():
+            self.dropped_frames += 1
+            return
+        try:
+            self.frames.put_nowait((FRAME, time.monotonic_ns() - self.start_ns, frame.copy(), encode))
+        except queue.Full:
+            self.dropped_frames += 1
+
+    # Write the records of one queue until stop()
+    def _run(self, source):
+        write = self.file.write
+        while True:
+            item = source.get()
+            if item is None:
+                break
+            kind, timestamp, data, encode = item
+            try:
+                payload = encode(data) if encode else data
+                with self.lock:
+                    write(RECORD.pack(kind, timestamp, len(payload)))
+                    write(payload)
+                    self.records[kind] += 1
+                    self.bytes += RECORD.size + len(payload)
+                    # Hand complete records to the OS when there is nothing else to do
+                    if source.empty():
+                        self.file.flush()
+            except Exception as e:
+                self.errors += 1
+                print(f"Session recorder failed: {e}")
+
+    # Records written per kind, bytes written and records and frames dropped or failed
+    def stats(self):
+        return {
+            "records": {KIND_NAMES[kind]: count for kind, count in self.records.items()},
+            "bytes": self.bytes,
+            "queued": self.queue.qsize(),
+            "queued_frames": self.frames.qsize(),
+            "dropped": self.dropped,
+            "dropped_frames": self.dropped_frames,
+            "errors": self.errors,
+        }
+
+
+# Read a session file, returns (wall clock start time, iterator of SessionRecords)
+def read_session(path):
+    f = open(path, "rb")
+    header = f.read(HEADER.size)
+    if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+        f.close()
+        raise ValueError(f"{path} is not a session recording")
+    started = HEADER.unpack(header)[1]
+
+    def records():
+        with f:
+            while True:
+                head = f.read(RECORD.size)
+                if len(head) < RECORD.size:
+                    return
+                kind, timestamp, length = RECORD.unpack(head)
+                data = f.read(length)
+                if len(data) < length:
+                    return
+                yield SessionRecord(kind, timestamp / 1e9, data)
+    return started, records()
@@ -0,0 +1,94 @@
+import time
+from recording.session_recorder import KIND_NAMES, read_session
+
+# Speed of a real time replay
+REAL_TIME = 1.0
+# Replay as fast as the handlers can take the records
+AS_FAST_AS_POSSIBLE = None
+
+
+# Mean, p99 and max in ms of durations in seconds, zeros when there are none
+def summary(values):
+    if not values:
+        return {"mean": 0.0, "p99": 0.0, "max": 0.0}
+    values = sorted(values)
+    return {
+        "mean": sum(values) / len(values) * 1000,
+        "p99": values[min(len(values) - 1, int(0.99 * len(values)))] * 1000,
+        "max": values[-1] * 1000,
+    }
+
+
+# SessionReplay reads a session recording and hands every record to the handler of its
+# kind (handler(record, now)), at the pace it was recorded (speed 1.0, or faster or slower)
+# or as fast as possible (speed None). now is the monotonic time the record stands for
+# during the replay: base + the record's time, so time based code such as the joystick
+# filters sees the original timing in both modes. The time every handler takes is kept
+# per kind, which turns a recorded session into a throughput and latency benchmark.
+class SessionReplay:
+    def __init__(self, path, speed=REAL_TIME):
+        self.path = path
+        self.speed = speed
+        self.handlers = {}
+        self.started = None
+        self._reset()
+
+    def _reset(self):
+        self.records = {kind: 0 for kind in KIND_NAMES}
+        self.bytes = {kind: 0 for kind in KIND_NAMES}
+        self.handler_times = {kind: [] for kind in KIND_NAMES}
+        self.late = []
+        self.duration = 0.0
+        self.wall_time = 0.0
+
+    # Call handler(record, now) for every record of a kind
+    def on(self, kind, handler):
+        self.handlers[kind] = handler
+        return self
+
+    def run(self):
+        self._reset()
+        self.started, records = read_session(self.path)
+        handlers = self.handlers
+        speed = self.speed
+        base = time.monotonic()
+        start = time.perf_counter()
+        for record in records:
+            kind = record.kind
+            if kind not in self.records:
+                continue
+            if speed:
+                wait = base + record.time / speed - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                else:
+                    self.late.append(-wait)
+            self.records[kind] += 1
+            self.bytes[kind] += len(record.data)
+            self.duration = record.time
+            handler = handlers.get(kind)
+            if handler is None:
+                continue
+            handled = time.perf_counter()
+            handler(record, base + record.time)
+            self.handler_times[kind].append(time.perf_counter() - handled)
+        self.wall_time = time.perf_counter() - start
+        return self.stats()
+
+    # Records, throughput and handler time (ms: mean, p99, max) per kind, and how late the
+    # records were handled in a paced replay
+    def stats(self):
+        wall_time = self.wall_time or 1e-9
+        return {
+            "duration": self.duration,
+            "wall_time": self.wall_time,
+            "kinds": {
+                KIND_NAMES[kind]: {
+                    "records": self.records[kind],
+                    "bytes": self.bytes[kind],
+                    "per_second": self.records[kind] / wall_time,
+                    "handler_ms": summary(self.handler_times[kind]),
+                } for kind in KIND_NAMES if self.records[kind]
+            },
+            "late_ms": summary(self.late),
+        }
@@ -10,12 +10,15 @@ class RemoteUI:
     Een afstandsbediening-UI voor het weergeven van camerabeelden
     en het activeren van acties zoals gripper-besturing en detectie.
     """
-    def __init__(self, width, height, camera_handler, gripper_controller= "", detectors=None):
+    def __init__(self, width, height, camera_handler, gripper_controller= "", detectors=None,
+                 motor_manager: MotorManager = None):
         # Sla afmetingen en handlers op
         self.width = width
         self.height = height
         self.camera = camera_handler
-        self.gripper_controller = MotorManager.toggle_gripper()
+        # MotorManager voor de noodstop en de gripper
+        self.motor_manager = motor_manager
+        self.gripper_controller = gripper_controller or (motor_manager.toggle_gripper if motor_manager else None)
         # Optionele dict met detectiefuncties per modus
         self.detectors = detectors or {}
 
@@ -102,15 +105,40 @@ class RemoteUI:
         """
         Activeer de gripper-controller.
         """
-        self.gripper_controller()
+        if self.gripper_controller:
+            self.gripper_controller()
 
     def on_stop_click(self):
         """
-        Stoppen: camera uitzetten en knopkleur bijwerken.
+        Noodstop: alle servo's stoppen met één broadcast-pakket.
+        De noodstop blijft actief tot de knop nogmaals wordt ingedrukt.
         """
         print("STOP-knop geklikt.")
-        self.camera.toggle_camera()
-        self.btn_cam.config(bg="#000000", fg="#ff4444")
+        if not self.motor_manager:
+            return
+        if self.stop_active():
+            self.motor_manager.clear_emergency_stop()
+        else:
+            self.motor_manager.emergency_stop()
+        self.update_stop_button()
+
+    def stop_active(self):
+        """
+        Of de noodstop actief is. Een gevraagde vrijgave telt als vrijgegeven,
+        de regellus voert die bij de volgende tick uit.
+        """
+        manager = self.motor_manager
+        return manager is not None and manager.emergency_stopped and not manager.release_requested
+
+    def update_stop_button(self):
+        """
+        Rode STOP-knop zolang de noodstop actief is.
+        """
+        stopped = self.stop_active()
+        self.btn_stop.config(
+            text="VRIJGEVEN" if stopped else "STOP",
+            bg="#cc0000" if stopped else self.btn_color
+        )
 
     def color_detect_click(self):
         """